@@ -0,0 +1,54 @@
+"""add items.owner_id
+
+Revision ID: b5f1c2d9a7e3
+Revises: e88d37835d33
+Create Date: 2026-10-19 11:02:17.384221
+
+The column is nullable so adding it is metadata only. On a plain items table
+the index is built concurrently and the foreign key is added NOT VALID and
+validated separately, so neither blocks writes while it scans. Partitioned
+tables support neither, so there both are added directly.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations import create_index_concurrently, drop_index_concurrently, is_dry_run
+from app.partitions import is_partitioned
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5f1c2d9a7e3'
+down_revision: Union[str, None] = 'e88d37835d33'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('items', sa.Column('owner_id', sa.Integer(), nullable=True))
+    if not is_dry_run() and is_partitioned(op.get_bind()):
+        op.create_index(op.f('ix_items_owner_id'), 'items', ['owner_id'], unique=False)
+        op.create_foreign_key(
+            'items_owner_id_fkey', 'items', 'users', ['owner_id'], ['id'], ondelete='SET NULL'
+        )
+        return
+
+    create_index_concurrently('ix_items_owner_id', 'items', ['owner_id'])
+    # Separate transactions, so the scan runs under VALIDATE's weaker lock.
+    with op.get_context().autocommit_block():
+        op.execute(
+            "ALTER TABLE items ADD CONSTRAINT items_owner_id_fkey FOREIGN KEY (owner_id) "
+            "REFERENCES users (id) ON DELETE SET NULL NOT VALID"
+        )
+        op.execute("ALTER TABLE items VALIDATE CONSTRAINT items_owner_id_fkey")
+
+
+def downgrade() -> None:
+    op.drop_constraint('items_owner_id_fkey', 'items', type_='foreignkey')
+    if not is_dry_run() and is_partitioned(op.get_bind()):
+        op.drop_index(op.f('ix_items_owner_id'), table_name='items')
+    else:
+        drop_index_concurrently('ix_items_owner_id')
+    op.drop_column('items', 'owner_id')
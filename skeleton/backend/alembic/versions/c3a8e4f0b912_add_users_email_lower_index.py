@@ -0,0 +1,28 @@
+"""add users lower(email) index
+
+Revision ID: c3a8e4f0b912
+Revises: b5f1c2d9a7e3
+Create Date: 2026-10-19 12:21:45.902318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a8e4f0b912'
+down_revision: Union[str, None] = 'b5f1c2d9a7e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    create_index_concurrently('ix_users_email_lower', 'users', ['lower(email)'])
+
+
+def downgrade() -> None:
+    drop_index_concurrently('ix_users_email_lower')
@@ -0,0 +1,56 @@
+"""add partial indexes for active rows
+
+Revision ID: d7e2b6a1c845
+Revises: c3a8e4f0b912
+Create Date: 2026-10-19 13:37:06.551870
+
+List endpoints return active rows only by default; these indexes hold just
+those rows. Partitioned items cannot be indexed concurrently, so there the
+index is created directly (it cascades to every partition).
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations import create_index_concurrently, drop_index_concurrently, is_dry_run
+from app.partitions import is_partitioned
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7e2b6a1c845'
+down_revision: Union[str, None] = 'c3a8e4f0b912'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _items_partitioned() -> bool:
+    return not is_dry_run() and is_partitioned(op.get_bind())
+
+
+def upgrade() -> None:
+    create_index_concurrently(
+        'ix_users_active_created_at', 'users', ['created_at', 'id'], where='is_active'
+    )
+    create_index_concurrently('ix_users_active_email', 'users', ['email'], where='is_active')
+    if _items_partitioned():
+        op.create_index(
+            'ix_items_active_created_at',
+            'items',
+            ['created_at', 'id'],
+            postgresql_where=sa.text('is_active'),
+        )
+    else:
+        create_index_concurrently(
+            'ix_items_active_created_at', 'items', ['created_at', 'id'], where='is_active'
+        )
+
+
+def downgrade() -> None:
+    if _items_partitioned():
+        op.drop_index('ix_items_active_created_at', table_name='items')
+    else:
+        drop_index_concurrently('ix_items_active_created_at')
+    drop_index_concurrently('ix_users_active_email')
+    drop_index_concurrently('ix_users_active_created_at')
@@ -0,0 +1,35 @@
+"""partition items by created_at
+
+Revision ID: e88d37835d33
+Revises: 4487609a0c44
+Create Date: 2026-10-19 09:40:03.117529
+
+Only applies when ITEMS_PARTITIONED is enabled; see app/partitions.py.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.config import settings
+from app.migrations import is_dry_run
+from app.partitions import convert_items_to_partitioned, is_partitioned, revert_items_to_plain
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e88d37835d33'
+down_revision: Union[str, None] = '4487609a0c44'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if settings.ITEMS_PARTITIONED:
+        convert_items_to_partitioned()
+
+
+def downgrade() -> None:
+    # Follow the table, not the setting, which may have changed since upgrade.
+    if not is_dry_run() and is_partitioned(op.get_bind()):
+        revert_items_to_plain()
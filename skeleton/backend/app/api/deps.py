@@ -1,6 +1,20 @@
 from fastapi import Depends, HTTPException, status
+from typing import Optional, Set
 from sqlalchemy.orm import Session
 from app.database import get_db
 
 def get_current_db(db: Session = Depends(get_db)) -> Session:
     return db
+
+def includes(*allowed: str):
+    """Dependency parsing a comma-separated ?include= against the allowed relations."""
+    def parse(include: Optional[str] = None) -> Set[str]:
+        requested = {name.strip() for name in (include or "").split(",") if name.strip()}
+        unknown = requested - set(allowed)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unsupported include: {', '.join(sorted(unknown))}",
+            )
+        return requested
+    return parse
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import users, items
+from app.api.v1.endpoints import users, items, imports
 
 api_router = APIRouter()
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(items.router, prefix="/items", tags=["items"])
+api_router.include_router(imports.router, prefix="/imports", tags=["imports"])
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app.api.deps import get_current_db
+from app.bulkheads import BulkheadRoute, bulkhead
+from app.controllers.import_controller import ImportController
+from app.schemas.import_job import ImportJobResponse
+
+router = APIRouter(route_class=BulkheadRoute)
+
+@router.get("/{import_id}", response_model=ImportJobResponse)
+@bulkhead("reads")
+def get_import(
+    import_id: int,
+    db: Session = Depends(get_current_db)
+):
+    controller = ImportController(db)
+    job = controller.get_import(import_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return job
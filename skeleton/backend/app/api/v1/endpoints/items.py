@@ -1,30 +1,101 @@
-from fastapi import APIRouter, Depends, HTTPException
+import os
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
-from app.api.deps import get_current_db
+from typing import List, Optional, Set, Union
+from app.api.deps import get_current_db, includes
+from app.bulkheads import BulkheadRoute, bulkhead
+from app.events import event_stream
+from app.importer import FORMATS, UploadTooLarge, spool_upload
 from app.controllers.item_controller import ItemController
-from app.schemas.item import ItemCreate, ItemResponse
+from app.controllers.import_controller import ImportController
+from app.controllers.user_controller import UserController
+from app.schemas.item import ItemCreate, ItemResponse, ItemWithOwnerResponse
+from app.schemas.import_job import ImportJobResponse
 
-router = APIRouter()
+router = APIRouter(route_class=BulkheadRoute)
 
 @router.post("/", response_model=ItemResponse)
+@bulkhead("writes")
 def create_item(
     item_data: ItemCreate,
     db: Session = Depends(get_current_db)
 ):
+    if item_data.owner_id is not None and not UserController(db).get_user(item_data.owner_id):
+        raise HTTPException(status_code=400, detail="Owner not found")
     controller = ItemController(db)
-    return controller.create_item(item_data)
+    try:
+        return controller.create_item(item_data)
+    except IntegrityError:
+        # The owner was deleted after the check above.
+        if item_data.owner_id is None:
+            raise
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Owner not found")
 
-@router.get("/", response_model=List[ItemResponse])
+@router.post("/import", response_model=ImportJobResponse, status_code=202)
+async def import_items(
+    request: Request,
+    db: Session = Depends(get_current_db)
+):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    format = FORMATS.get(content_type)
+    if not format:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported import type, expected one of: {', '.join(FORMATS)}",
+        )
+    try:
+        path = await spool_upload(request)
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail="Import file too large")
+    controller = ImportController(db)
+    try:
+        return await run_in_threadpool(controller.start_import, "items", format, path)
+    except Exception:
+        os.unlink(path)
+        raise
+
+@router.get("/", response_model=List[Union[ItemResponse, ItemWithOwnerResponse]])
+@bulkhead("heavy")
 def get_items(
     skip: int = 0,
     limit: int = 100,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    active_only: bool = True,
+    include: Set[str] = Depends(includes("owner")),
     db: Session = Depends(get_current_db)
 ):
     controller = ItemController(db)
-    return controller.get_items(skip=skip, limit=limit)
+    items = controller.get_items(
+        skip=skip,
+        limit=limit,
+        created_after=created_after,
+        created_before=created_before,
+        active_only=active_only,
+        include=include,
+    )
+    if "owner" in include:
+        return [ItemWithOwnerResponse.model_validate(item) for item in items]
+    return items
+
+@router.get("/changes")
+async def stream_item_changes(
+    request: Request,
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID")
+):
+    return StreamingResponse(
+        event_stream(request, "items", last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.get("/{item_id}", response_model=ItemResponse)
+@bulkhead("reads")
 def get_item(
     item_id: int,
     db: Session = Depends(get_current_db)
@@ -1,13 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from datetime import datetime
 from sqlalchemy.orm import Session
-from typing import List
-from app.api.deps import get_current_db
+from typing import List, Optional, Set, Union
+from app.api.deps import get_current_db, includes
+from app.bulkheads import BulkheadRoute, bulkhead
+from app.events import event_stream
 from app.controllers.user_controller import UserController
-from app.schemas.user import UserCreate, UserResponse
+from app.schemas.user import (
+    EmailExistsResponse,
+    UserCreate,
+    UserResponse,
+    UserWithItemsResponse,
+)
 
-router = APIRouter()
+router = APIRouter(route_class=BulkheadRoute)
 
 @router.post("/", response_model=UserResponse)
+@bulkhead("writes")
 def create_user(
     user_data: UserCreate,
     db: Session = Depends(get_current_db)
@@ -16,21 +26,55 @@ def create_user(
     return controller.create_user(user_data)
 
 @router.get("/", response_model=List[UserResponse])
+@bulkhead("heavy")
 def get_users(
     skip: int = 0,
     limit: int = 100,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    active_only: bool = True,
     db: Session = Depends(get_current_db)
 ):
     controller = UserController(db)
-    return controller.get_users(skip=skip, limit=limit)
+    return controller.get_users(
+        skip=skip,
+        limit=limit,
+        created_after=created_after,
+        created_before=created_before,
+        active_only=active_only,
+    )
 
-@router.get("/{user_id}", response_model=UserResponse)
+@router.get("/exists", response_model=EmailExistsResponse)
+@bulkhead("reads")
+def email_exists(
+    email: str = Query(..., min_length=1),
+    db: Session = Depends(get_current_db)
+):
+    controller = UserController(db)
+    return {"exists": controller.email_exists(email)}
+
+@router.get("/changes")
+async def stream_user_changes(
+    request: Request,
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID")
+):
+    return StreamingResponse(
+        event_stream(request, "users", last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/{user_id}", response_model=Union[UserResponse, UserWithItemsResponse])
+@bulkhead("reads")
 def get_user(
     user_id: int,
+    include: Set[str] = Depends(includes("items")),
     db: Session = Depends(get_current_db)
 ):
     controller = UserController(db)
-    user = controller.get_user(user_id)
+    user = controller.get_user(user_id, include=include)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    if "items" in include:
+        return UserWithItemsResponse.model_validate(user)
     return user
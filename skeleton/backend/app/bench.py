@@ -0,0 +1,154 @@
+"""
+Benchmark of active-only reads with and without the WHERE is_active indexes.
+
+Seeds temporary copies of items and users (nothing touches the real tables)
+with a share of inactive rows, then EXPLAIN ANALYZEs the queries the
+repositories run for active-only reads: once with a plain index on the same
+columns and once with the partial index. Run with: make bench
+
+    python -m app.bench --rows 500000 --inactive-ratio 0.7
+"""
+
+import argparse
+import json
+from typing import Any, Dict, Iterator, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.database import engine
+
+PAGE_SIZE = 100
+
+# (label, table, columns, query); queries read the active-only path.
+CASES = [
+    (
+        "items page (created_at, id)",
+        "bench_items",
+        "created_at, id",
+        "SELECT * FROM bench_items WHERE is_active "
+        "ORDER BY created_at, id LIMIT :limit OFFSET :offset",
+    ),
+    (
+        "users page (created_at, id)",
+        "bench_users",
+        "created_at, id",
+        "SELECT * FROM bench_users WHERE is_active "
+        "ORDER BY created_at, id LIMIT :limit OFFSET :offset",
+    ),
+    (
+        "users by email",
+        "bench_users",
+        "email",
+        "SELECT id FROM bench_users WHERE is_active AND email = :email",
+    ),
+]
+
+
+def seed(connection: Connection, rows: int, inactive_ratio: float) -> None:
+    connection.execute(
+        text(
+            "CREATE TEMP TABLE bench_items AS "
+            "SELECT n AS id, 'Item ' || n AS title, repeat('x', 200) AS description, "
+            "random() >= :ratio AS is_active, "
+            "now() - (:rows - n) * interval '1 minute' AS created_at "
+            "FROM generate_series(1, :rows) AS n"
+        ),
+        {"rows": rows, "ratio": inactive_ratio},
+    )
+    connection.execute(
+        text(
+            "CREATE TEMP TABLE bench_users AS "
+            "SELECT n AS id, 'user' || n || '@example.com' AS email, "
+            "random() >= :ratio AS is_active, "
+            "now() - (:rows - n) * interval '1 minute' AS created_at "
+            "FROM generate_series(1, :rows) AS n"
+        ),
+        {"rows": rows, "ratio": inactive_ratio},
+    )
+
+
+def _nodes(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _nodes(child)
+
+
+def measure(connection: Connection, query: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    explained = connection.execute(
+        text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}"), params
+    ).scalar()
+    if isinstance(explained, str):
+        explained = json.loads(explained)
+    plan = explained[0]["Plan"]
+    scans = [node for node in _nodes(plan) if "Scan" in node["Node Type"]]
+    return {
+        "rows_scanned": sum(
+            node["Actual Rows"] + node.get("Rows Removed by Filter", 0) for node in scans
+        ),
+        # Temporary tables live in local buffers rather than shared ones.
+        "buffers": sum(
+            plan.get(f"{kind} {access} Blocks", 0)
+            for kind in ("Shared", "Local")
+            for access in ("Hit", "Read")
+        ),
+        "ms": round(explained[0]["Execution Time"], 2),
+    }
+
+
+def run(rows: int, inactive_ratio: float) -> List[Tuple[str, str, Dict[str, Any]]]:
+    results = []
+    with engine.connect() as connection:
+        seed(connection, rows, inactive_ratio)
+        active = connection.execute(
+            text("SELECT count(*) FROM bench_items WHERE is_active")
+        ).scalar_one()
+        email = connection.execute(
+            text("SELECT email FROM bench_users WHERE is_active ORDER BY id DESC LIMIT 1")
+        ).scalar()
+        # A page deep into the active rows, where the difference shows most.
+        params = {"limit": PAGE_SIZE, "offset": active // 2, "email": email}
+        for label, table, columns, query in CASES:
+            for variant, where in (("full index", ""), ("partial index", " WHERE is_active")):
+                connection.execute(
+                    text(f"CREATE INDEX bench_index ON {table} ({columns}){where}")
+                )
+                connection.execute(text(f"ANALYZE {table}"))
+                result = measure(connection, query, params)
+                result["index_kb"] = (
+                    connection.execute(
+                        text("SELECT pg_relation_size('bench_index')")
+                    ).scalar_one()
+                    // 1024
+                )
+                results.append((label, variant, result))
+                connection.execute(text("DROP INDEX bench_index"))
+        connection.rollback()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark active-only reads")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--inactive-ratio", type=float, default=0.7)
+    args = parser.parse_args()
+
+    print(
+        f"{args.rows} rows per table, {args.inactive_ratio:.0%} inactive, "
+        f"page size {PAGE_SIZE}"
+    )
+    header = (
+        f"{'query':<30} {'index':<14} {'rows scanned':>12} "
+        f"{'buffers':>8} {'index KB':>9} {'ms':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    for label, variant, result in run(args.rows, args.inactive_ratio):
+        print(
+            f"{label:<30} {variant:<14} {result['rows_scanned']:>12} "
+            f"{result['buffers']:>8} {result['index_kb']:>9} {result['ms']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Per-worker Bloom filter over users.email for GET /users/exists.
+
+A Bloom filter never reports a present member as absent, so a negative answer
+is final and costs no query; only possible positives are confirmed against
+the lower(email) index. Emails are normalized to lower case.
+
+The filter is built in the background at startup; until it is ready every
+check goes to the database. UserRepository adds emails it writes, and events
+dispatched by the change feed add emails written by other workers. An event
+whose row data was dropped (see PostgresChangeBroker.stage), or a reset after
+the change feed lost events, triggers a rebuild. Writes that publish no
+change event at all, such as app/seed.py or manual SQL, are picked up by a
+periodic rebuild every EMAIL_FILTER_REBUILD_SECONDS; until then such an email
+can be reported as free. Deleted emails cannot be removed and simply stay
+possible positives.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.database import SessionLocal
+from app.events import ChangeEvent, on_event
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(
+            int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)), 8
+        )
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str) -> Iterable[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest.
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, value: str) -> None:
+        changed = False
+        for position in self._positions(value):
+            mask = 1 << (position & 7)
+            changed = changed or not self._bits[position >> 3] & mask
+            self._bits[position >> 3] |= mask
+        # Values already present (such as a local write that also comes back
+        # through the change feed) are not counted twice.
+        if changed:
+            self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+class EmailFilter:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._filter: Optional[BloomFilter] = None
+        self._building: Optional[BloomFilter] = None
+        self._thread: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._ready = threading.Event()
+        self.checks = 0
+        self.negatives = 0
+        self.false_positives = 0
+
+    def start(self) -> None:
+        """Build the filter in the background now, and then periodically."""
+        if not settings.EMAIL_FILTER_ENABLED:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                self._wake.set()
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="email-filter", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Wait until a filter is in use."""
+        self._ready.wait(timeout)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.clear()
+            try:
+                self.build()
+            except Exception:
+                logger.exception("building the email filter failed")
+            self._wake.wait(settings.EMAIL_FILTER_REBUILD_SECONDS)
+
+    def build(self) -> None:
+        with SessionLocal() as db:
+            total = db.scalar(select(func.count()).select_from(User)) or 0
+            bloom = BloomFilter(
+                max(total * 2, settings.EMAIL_FILTER_CAPACITY),
+                settings.EMAIL_FILTER_ERROR_RATE,
+            )
+            # Emails written while the table is being read go to both filters.
+            with self._lock:
+                self._building = bloom
+            try:
+                emails = db.execute(
+                    select(func.lower(User.email)).execution_options(yield_per=10000)
+                ).scalars()
+                for batch in emails.partitions():
+                    with self._lock:
+                        for email in batch:
+                            bloom.add(email)
+            except BaseException:
+                with self._lock:
+                    self._building = None
+                raise
+        with self._lock:
+            self._filter = bloom
+            self._building = None
+        self._ready.set()
+        logger.info("email filter built from %d users", bloom.count)
+
+    def invalidate(self) -> None:
+        """Stop trusting the filter until a rebuild has finished."""
+        with self._lock:
+            self._filter = None
+            self._ready.clear()
+        self.start()
+
+    def add(self, email: str) -> None:
+        email = normalize_email(email)
+        with self._lock:
+            for bloom in (self._filter, self._building):
+                if bloom is not None:
+                    bloom.add(email)
+            # Far past its capacity the false positive rate climbs; start over.
+            bloom = self._filter
+            overfull = bloom is not None and bloom.count > 2 * bloom.capacity
+        if overfull:
+            self.start()
+
+    def might_contain(self, email: str) -> bool:
+        email = normalize_email(email)
+        with self._lock:
+            self.checks += 1
+            if self._filter is None or email in self._filter:
+                return True
+            self.negatives += 1
+            return False
+
+    def record_false_positive(self) -> None:
+        with self._lock:
+            self.false_positives += 1
+
+    def on_event(self, change: ChangeEvent) -> None:
+        if change.channel != "users" or change.op not in ("create", "update", "reset"):
+            return
+        if change.data and change.data.get("email"):
+            self.add(change.data["email"])
+        else:
+            self.invalidate()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            bloom = self._filter
+            return {
+                "ready": bloom is not None,
+                "emails": bloom.count if bloom else 0,
+                "bits": bloom.size if bloom else 0,
+                "hashes": bloom.hashes if bloom else 0,
+                "checks": self.checks,
+                "negatives": self.negatives,
+                "false_positives": self.false_positives,
+            }
+
+
+email_filter = EmailFilter()
+on_event(email_filter.on_event)
+
+
+def get_email_filter() -> EmailFilter:
+    return email_filter
@@ -0,0 +1,205 @@
+"""
+Bulkhead threadpools for sync routes.
+
+Starlette runs every sync endpoint on one shared 40-thread pool, so a burst of
+slow queries on one route starves everything else. Routes on a router using
+BulkheadRoute opt into a named bulkhead instead:
+
+    router = APIRouter(route_class=BulkheadRoute)
+
+    @router.get("/")
+    @bulkhead("heavy")
+    def get_items(...):
+
+Each bulkhead has its own thread limit (settings.BULKHEADS, capped at its
+share of connections) and its own database connection pool
+(app.database.bulkhead_engines). The endpoint, the
+validation and rendering of its response, and closing its database session
+all happen in one bulkhead thread, so neither the event loop nor the shared
+pool does that work and connections are back in the pool before the response
+is sent. Routes without a bulkhead, such as /health, keep using the default
+pool.
+"""
+
+import asyncio
+import copy
+import functools
+import threading
+import time
+from typing import Any, Callable, Coroutine, Dict, Optional, Type, TypeVar
+
+import anyio
+from anyio import CapacityLimiter
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import ResponseValidationError
+from fastapi.routing import APIRoute, get_request_handler
+from fastapi.utils import is_body_allowed_for_status_code
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.config import settings
+from app.database import bulkhead_connections, bulkhead_engines, current_bulkhead
+
+T = TypeVar("T")
+
+
+class Bulkhead:
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = size
+        self._admission: Optional[CapacityLimiter] = None
+        self._threads: Optional[CapacityLimiter] = None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.waiting = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _limiters(self):
+        # anyio limiters can only be created inside a running event loop.
+        if self._admission is None:
+            self._admission = CapacityLimiter(self.size)
+            self._threads = CapacityLimiter(self.size)
+        return self._admission, self._threads
+
+    async def run(self, func: Callable[[], T]) -> T:
+        admission, threads = self._limiters()
+        queued_at = time.perf_counter()
+        with self._lock:
+            self.waiting += 1
+        try:
+            await admission.acquire()
+        finally:
+            waited = time.perf_counter() - queued_at
+            with self._lock:
+                self.waiting -= 1
+                self.calls += 1
+                self.wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        try:
+            return await anyio.to_thread.run_sync(self._call, func, limiter=threads)
+        finally:
+            admission.release()
+
+    def _call(self, func: Callable[[], T]) -> T:
+        token = current_bulkhead.set(self.name)
+        try:
+            return func()
+        finally:
+            current_bulkhead.reset(token)
+
+    def stats(self) -> Dict[str, Any]:
+        engine = bulkhead_engines.get(self.name)
+        pool = engine.pool if engine else None
+        with self._lock:
+            return {
+                "size": self.size,
+                "busy": self._admission.borrowed_tokens if self._admission else 0,
+                "queue_depth": self.waiting,
+                "calls": self.calls,
+                "wait_seconds_total": round(self.wait_seconds, 6),
+                "wait_seconds_avg": round(self.wait_seconds / self.calls, 6)
+                if self.calls
+                else 0.0,
+                "wait_seconds_max": round(self.max_wait_seconds, 6),
+                "db_connections_in_use": pool.checkedout()
+                if isinstance(pool, QueuePool)
+                else 0,
+            }
+
+
+bulkheads: Dict[str, Bulkhead] = {
+    name: Bulkhead(name, min(size, bulkhead_connections[name]))
+    for name, size in settings.BULKHEADS.items()
+}
+
+
+def bulkhead(name: str):
+    """Run a sync route in the named bulkhead instead of the shared threadpool.
+
+    Takes effect on routers whose route_class is BulkheadRoute. Routes naming
+    a bulkhead that is not configured stay on the default pool.
+    """
+
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        setattr(func, "bulkhead", name)
+        return func
+
+    return decorator
+
+
+class BulkheadRoute(APIRoute):
+    """APIRoute running sync endpoints marked with @bulkhead in their pool."""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        pool = bulkheads.get(getattr(self.endpoint, "bulkhead", ""))
+        endpoint = self.dependant.call
+        if pool is None or endpoint is None or asyncio.iscoroutinefunction(endpoint):
+            return super().get_route_handler()
+
+        async def call(**values: Any) -> Response:
+            return await pool.run(functools.partial(self._respond, endpoint, values))
+
+        # FastAPI still reads the body and solves dependencies on the loop;
+        # the endpoint hands back a finished Response, which it passes through.
+        dependant = copy.copy(self.dependant)
+        dependant.call = call
+        return get_request_handler(
+            dependant=dependant,
+            body_field=self.body_field,
+            dependency_overrides_provider=self.dependency_overrides_provider,
+        )
+
+    def _respond(self, endpoint: Callable[..., Any], values: Dict[str, Any]) -> Response:
+        try:
+            content = endpoint(**values)
+            if isinstance(content, Response):
+                return content
+            return self._render(content, values)
+        finally:
+            # The dependency's own teardown runs only after the response has
+            # been sent; give the connection back now, from this thread.
+            for value in values.values():
+                if isinstance(value, Session):
+                    value.close()
+
+    def _render(self, content: Any, values: Dict[str, Any]) -> Response:
+        field = self.response_field
+        if field is None:
+            content = jsonable_encoder(content)
+        else:
+            value, errors = field.validate(content, {}, loc=("response",))
+            if errors:
+                raise ResponseValidationError(errors=list(errors), body=content)
+            content = field.serialize(
+                value,
+                include=self.response_model_include,
+                exclude=self.response_model_exclude,
+                by_alias=self.response_model_by_alias,
+                exclude_unset=self.response_model_exclude_unset,
+                exclude_defaults=self.response_model_exclude_defaults,
+                exclude_none=self.response_model_exclude_none,
+            )
+        response_class: Type[Response] = (
+            self.response_class.value
+            if isinstance(self.response_class, DefaultPlaceholder)
+            else self.response_class
+        )
+        sub_response = values.get(self.dependant.response_param_name or "")
+        status_code = self.status_code
+        if isinstance(sub_response, Response) and sub_response.status_code:
+            status_code = sub_response.status_code
+        kwargs: Dict[str, Any] = {} if status_code is None else {"status_code": status_code}
+        response = response_class(content, **kwargs)
+        if not is_body_allowed_for_status_code(response.status_code):
+            response.body = b""
+        if isinstance(sub_response, Response):
+            response.headers.raw.extend(sub_response.headers.raw)
+        return response
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    return {name: pool.stats() for name, pool in bulkheads.items()}
@@ -0,0 +1,137 @@
+"""
+Single-flight coalescing of identical concurrent reads.
+
+When many clients GET the same resource at once, only the first request (the
+leader) runs the endpoint; the others wait for it and are sent a copy of its
+response, so they share one database query and one encoded body.
+
+Requests are keyed by path, query parameters and the headers a response may
+vary on, plus generation counters for the change feed channels the response
+is built from (items embed their owner, so item reads depend on users too).
+Every committed write to a channel bumps its generation (app.events calls
+back on commit, and on dispatch for writes from other workers), so a request
+arriving after a write in the same worker never joins a flight that started
+before it.
+
+Across workers the guarantee is weaker: a write committed by another worker
+bumps the generation here only when its NOTIFY is delivered, so for that
+short window a request can still join a flight that started before the write
+and be sent a response without it. Routes that need read-your-writes across
+workers should not be coalesced.
+"""
+
+import asyncio
+import re
+import threading
+from typing import Dict, List, Optional, Pattern, Tuple
+from urllib.parse import parse_qsl
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.events import on_change
+
+# Request headers that can change the response body.
+# CORS runs inside this middleware, so origin decides Access-Control-Allow-Origin.
+VARY_HEADERS = (b"accept", b"accept-encoding", b"authorization", b"cookie", b"origin")
+
+CapturedResponse = List[Message]
+
+
+class Generations:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._values: Dict[str, int] = {}
+
+    def get(self, channel: str) -> int:
+        with self._lock:
+            return self._values.get(channel, 0)
+
+    def bump(self, channel: str) -> None:
+        with self._lock:
+            self._values[channel] = self._values.get(channel, 0) + 1
+
+
+generations = Generations()
+on_change(generations.bump)
+
+# Per channel: requests that ran the endpoint, and requests served a copy.
+counts: Dict[str, Dict[str, int]] = {}
+
+
+class CoalescingMiddleware:
+    """Coalesce concurrent GETs on the given routes.
+
+    `routes` maps a path regex to the change feed channels whose writes
+    invalidate it; counts are reported under the first one.
+    """
+
+    def __init__(self, app: ASGIApp, routes: Dict[str, Tuple[str, ...]]) -> None:
+        self.app = app
+        self.routes: List[Tuple[Pattern[str], Tuple[str, ...]]] = [
+            (re.compile(pattern), channels) for pattern, channels in routes.items()
+        ]
+        self._flights: Dict[Tuple, "asyncio.Future[Optional[CapturedResponse]]"] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        channels = self._channels(scope)
+        if channels is None:
+            await self.app(scope, receive, send)
+            return
+
+        channel = channels[0]
+        key = self._key(scope, channels)
+        flight = self._flights.get(key)
+        if flight is not None:
+            shared = await asyncio.shield(flight)
+            if shared is not None:
+                _count(channel, "coalesced")
+                for message in shared:
+                    await send(message)
+                return
+            # The leader failed; run the request on its own.
+            await self.app(scope, receive, send)
+            return
+
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        _count(channel, "leaders")
+        captured: CapturedResponse = []
+
+        async def capture(message: Message) -> None:
+            captured.append(message)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        except BaseException:
+            flight.set_result(None)
+            raise
+        else:
+            flight.set_result(captured)
+        finally:
+            del self._flights[key]
+
+    def _channels(self, scope: Scope) -> Optional[Tuple[str, ...]]:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return None
+        for pattern, channels in self.routes:
+            if pattern.fullmatch(scope["path"]):
+                return channels
+        return None
+
+    def _key(self, scope: Scope, channels: Tuple[str, ...]) -> Tuple:
+        query = tuple(sorted(parse_qsl(scope["query_string"].decode("latin-1"), True)))
+        headers = tuple(
+            sorted((name, value) for name, value in scope["headers"] if name in VARY_HEADERS)
+        )
+        versions = tuple(generations.get(channel) for channel in channels)
+        return scope["path"], query, headers, channels, versions
+
+
+def _count(channel: str, name: str) -> None:
+    channel_counts = counts.setdefault(channel, {"leaders": 0, "coalesced": 0})
+    channel_counts[name] += 1
+
+
+def stats() -> Dict[str, Dict[str, int]]:
+    return {channel: dict(channel_counts) for channel, channel_counts in counts.items()}
@@ -0,0 +1,301 @@
+"""
+Response compression negotiated from Accept-Encoding.
+
+zstd and brotli are offered when their packages (zstandard, brotli) are
+installed; gzip always is. Among the encodings the client accepts with the
+highest q-value, the first in settings.COMPRESSION_ENCODINGS wins.
+
+Complete bodies smaller than COMPRESSION_MINIMUM_SIZE go out as they are.
+Streaming responses (such as the SSE change feed) are compressed chunk by
+chunk and flushed after every chunk, so clients see each event as it is sent.
+Anything at least COMPRESSION_THREAD_SIZE bytes is compressed in a worker
+thread rather than on the event loop.
+
+Bytes in and out and the CPU time spent compressing are counted per route
+and reported by GET /metrics.
+"""
+
+import importlib
+import threading
+import time
+import zlib
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+
+def _optional_module(name: str) -> Optional[ModuleType]:
+    try:
+        return importlib.import_module(name)
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+
+
+zstandard = _optional_module("zstandard")
+brotli = _optional_module("brotli")
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+class Stream:
+    """Incremental compressor; every chunk is flushed so it can be decoded."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        self._zstd: Any = None
+        self._zstd_flush_block: int = 0
+        self._brotli: Any = None
+        self._gzip: Optional["zlib._Compress"] = None
+        if encoding == "zstd" and zstandard is not None:
+            self._zstd = zstandard.ZstdCompressor(level=3).compressobj()
+            self._zstd_flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        elif encoding == "br" and brotli is not None:
+            self._brotli = brotli.Compressor(quality=4)
+        elif encoding == "gzip":
+            self._gzip = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+        else:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+
+    def compress(self, data: bytes) -> bytes:
+        if self._zstd is not None:
+            return self._zstd.compress(data) + self._zstd.flush(self._zstd_flush_block)
+        if self._brotli is not None:
+            return self._brotli.process(data) + self._brotli.flush()
+        assert self._gzip is not None
+        return self._gzip.compress(data) + self._gzip.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self._zstd is not None:
+            return self._zstd.flush()
+        if self._brotli is not None:
+            return self._brotli.finish()
+        assert self._gzip is not None
+        return self._gzip.flush()
+
+
+def compress(encoding: str, data: bytes) -> bytes:
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data, quality=4)
+    if encoding != "gzip":
+        raise ValueError(f"Unsupported encoding: {encoding}")
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    return compressor.compress(data) + compressor.flush()
+
+
+def available_encodings() -> List[str]:
+    installed = {"zstd": zstandard is not None, "br": brotli is not None, "gzip": True}
+    return [name for name in settings.COMPRESSION_ENCODINGS if installed.get(name)]
+
+
+def negotiate(accept_encoding: str, encodings: List[str]) -> Optional[str]:
+    """Pick an encoding from an Accept-Encoding header, or None for identity."""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        param, _, value = params.strip().partition("=")
+        if param.strip().lower() == "q":
+            try:
+                weight = float(value)
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+    choices = [
+        (weights.get(name, weights.get("*", 0.0)), -rank, name)
+        for rank, name in enumerate(encodings)
+    ]
+    best = max(choices, default=None)
+    if best is None or best[0] <= 0:
+        return None
+    return best[2]
+
+
+class RouteStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, float]] = {}
+
+    def record(self, route: str, bytes_in: int, bytes_out: int, cpu_seconds: float) -> None:
+        with self._lock:
+            stats = self._routes.setdefault(
+                route,
+                {"responses": 0, "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0},
+            )
+            stats["responses"] += 1
+            stats["bytes_in"] += bytes_in
+            stats["bytes_out"] += bytes_out
+            stats["cpu_seconds"] += cpu_seconds
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                route: {
+                    **stats,
+                    "cpu_seconds": round(stats["cpu_seconds"], 6),
+                    "ratio": round(stats["bytes_in"] / stats["bytes_out"], 2)
+                    if stats["bytes_out"]
+                    else 0.0,
+                }
+                for route, stats in self._routes.items()
+            }
+
+
+route_stats = RouteStats()
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    return route_stats.snapshot()
+
+
+def _is_compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    return (
+        content_type.startswith("text/")
+        or content_type.endswith("+json")
+        or content_type in COMPRESSIBLE_TYPES
+    )
+
+
+def _route_name(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+async def _timed(size: int, func: Callable[..., bytes], *args: Any) -> Tuple[bytes, float]:
+    """Run func, in a worker thread for large inputs; returns its CPU time too."""
+
+    def run() -> Tuple[bytes, float]:
+        started = time.thread_time()
+        result = func(*args)
+        return result, time.thread_time() - started
+
+    if size >= settings.COMPRESSION_THREAD_SIZE:
+        return await anyio.to_thread.run_sync(run)
+    return run()
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await CompressedResponder(self.app, encoding)(scope, receive, send)
+
+
+class CompressedResponder:
+    def __init__(self, app: ASGIApp, encoding: str) -> None:
+        self.app = app
+        self.encoding = encoding
+        self.send: Send
+        self.scope: Scope
+        self.start: Optional[Message] = None
+        self.started = False
+        self.stream: Optional[Stream] = None
+        self.passthrough = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.scope = scope
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = not _is_compressible(headers) or message["status"] in (
+                204,
+                304,
+            )
+            return
+        start = self.start
+        if message["type"] != "http.response.body" or start is None:
+            await self.send(message)
+            return
+        if self.passthrough:
+            await self._send_start(start)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.stream is None and not more_body:
+            await self._send_whole(start, body)
+            return
+
+        if self.stream is None:
+            self.stream = Stream(self.encoding)
+            headers = MutableHeaders(raw=start["headers"])
+            del headers["content-length"]
+            self._mark_encoded(headers)
+            await self._send_start(start)
+        chunk, cpu = await _timed(len(body), self.stream.compress, body)
+        if not more_body:
+            tail, finish_cpu = await _timed(0, self.stream.finish)
+            chunk += tail
+            cpu += finish_cpu
+        self._count(len(body), len(chunk), cpu)
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        if not more_body:
+            self._record()
+
+    async def _send_whole(self, start: Message, body: bytes) -> None:
+        if len(body) < settings.COMPRESSION_MINIMUM_SIZE:
+            await self._send_start(start)
+            await self.send({"type": "http.response.body", "body": body})
+            return
+        compressed, cpu = await _timed(len(body), compress, self.encoding, body)
+        self._count(len(body), len(compressed), cpu)
+        headers = MutableHeaders(raw=start["headers"])
+        headers["content-length"] = str(len(compressed))
+        self._mark_encoded(headers)
+        await self._send_start(start)
+        await self.send({"type": "http.response.body", "body": compressed})
+        self._record()
+
+    def _mark_encoded(self, headers: MutableHeaders) -> None:
+        headers["content-encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+
+    async def _send_start(self, start: Message) -> None:
+        if not self.started:
+            self.started = True
+            await self.send(start)
+
+    def _count(self, bytes_in: int, bytes_out: int, cpu_seconds: float) -> None:
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+        self.cpu_seconds += cpu_seconds
+
+    def _record(self) -> None:
+        route_stats.record(
+            _route_name(self.scope), self.bytes_in, self.bytes_out, self.cpu_seconds
+        )
@@ -0,0 +1,18 @@
+from sqlalchemy.orm import Session
+from typing import Optional, cast
+from app.importer import get_runner
+from app.repositories.import_job_repository import ImportJobRepository
+from app.schemas.import_job import ImportJobCreate
+from app.models.import_job import ImportJob
+
+class ImportController:
+    def __init__(self, db: Session):
+        self.repository = ImportJobRepository(db)
+    
+    def start_import(self, target: str, format: str, path: str) -> ImportJob:
+        job = self.repository.create(obj_in=ImportJobCreate(target=target, format=format))
+        get_runner().submit(cast(int, job.id), path, format)
+        return job
+    
+    def get_import(self, import_id: int) -> Optional[ImportJob]:
+        return self.repository.get(import_id)
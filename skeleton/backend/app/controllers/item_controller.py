@@ -1,5 +1,6 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from datetime import datetime
+from sqlalchemy.orm import Session, selectinload
+from typing import Collection, List, Optional
 from app.repositories.item_repository import ItemRepository
 from app.schemas.item import ItemCreate, ItemUpdate
 from app.models.item import Item
@@ -14,8 +15,25 @@ class ItemController:
     def get_item(self, item_id: int) -> Optional[Item]:
         return self.repository.get(item_id)
     
-    def get_items(self, skip: int = 0, limit: int = 100) -> List[Item]:
-        return self.repository.get_multi(skip=skip, limit=limit)
+    def get_items(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        active_only: bool = True,
+        include: Collection[str] = (),
+    ) -> List[Item]:
+        # Owners of the whole page are fetched in one IN query.
+        options = [selectinload(Item.owner)] if "owner" in include else []
+        return self.repository.get_multi(
+            skip=skip,
+            limit=limit,
+            created_after=created_after,
+            created_before=created_before,
+            active_only=active_only,
+            options=options,
+        )
     
     def update_item(self, item_id: int, item_data: ItemUpdate) -> Optional[Item]:
         item = self.repository.get(item_id)
@@ -1,5 +1,8 @@
+from datetime import datetime
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Collection, List, Optional
+from app.bloom import get_email_filter
+from app.config import settings
 from app.repositories.user_repository import UserRepository
 from app.schemas.user import UserCreate, UserUpdate
 from app.models.user import User
@@ -11,11 +14,36 @@ class UserController:
     def create_user(self, user_data: UserCreate) -> User:
         return self.repository.create(obj_in=user_data)
     
-    def get_user(self, user_id: int) -> Optional[User]:
-        return self.repository.get(user_id)
+    def get_user(self, user_id: int, include: Collection[str] = ()) -> Optional[User]:
+        user = self.repository.get(user_id)
+        if user and "items" in include:
+            self.repository.load_items([user], settings.INCLUDE_MAX_ITEMS)
+        return user
+    
+    def email_exists(self, email: str) -> bool:
+        email_filter = get_email_filter()
+        if not email_filter.might_contain(email):
+            return False
+        exists = self.repository.email_exists(email)
+        if not exists:
+            email_filter.record_false_positive()
+        return exists
     
-    def get_users(self, skip: int = 0, limit: int = 100) -> List[User]:
-        return self.repository.get_multi(skip=skip, limit=limit)
+    def get_users(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        active_only: bool = True,
+    ) -> List[User]:
+        return self.repository.get_multi(
+            skip=skip,
+            limit=limit,
+            created_after=created_after,
+            created_before=created_before,
+            active_only=active_only,
+        )
     
     def update_user(self, user_id: int, user_data: UserUpdate) -> Optional[User]:
         user = self.repository.get(user_id)
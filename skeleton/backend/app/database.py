@@ -1,10 +1,59 @@
+from contextvars import ContextVar
+from typing import Dict, Optional
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def split_connections(budget: int, weights: Dict[str, int]) -> Dict[str, int]:
+    """Share budget out, one each and the rest in proportion to weights."""
+    if len(weights) > budget:
+        raise ValueError(
+            f"{len(weights)} bulkheads need at least as many connections, got {budget}"
+        )
+    shares = {name: 1 for name in weights}
+    total = sum(weights.values())
+    if not total:
+        return shares
+    spare = budget - len(weights)
+    exact = {name: spare * weight / total for name, weight in weights.items()}
+    for name, share in exact.items():
+        shares[name] += int(share)
+    # Largest remainders take whatever rounding down left over.
+    by_remainder = sorted(exact, key=lambda name: exact[name] - int(exact[name]), reverse=True)
+    for name in by_remainder[: budget - sum(shares.values())]:
+        shares[name] += 1
+    return shares
+
+# Each bulkhead (see app/bulkheads.py) gets its own connection pool, so one
+# class of routes cannot exhaust the others' connections. The pools are carved
+# out of DATABASE_MAX_OVERFLOW in proportion to the bulkheads' thread counts,
+# keeping a process within DATABASE_POOL_SIZE + DATABASE_MAX_OVERFLOW
+# connections. A bulkhead runs no more threads than its pool has connections,
+# so requests beyond that wait in its admission queue rather than timing out
+# on the pool.
+bulkhead_connections = split_connections(settings.DATABASE_MAX_OVERFLOW, settings.BULKHEADS)
+
+engine = create_engine(
+    settings.DATABASE_URL,
+    pool_size=settings.DATABASE_POOL_SIZE,
+    max_overflow=0 if bulkhead_connections else settings.DATABASE_MAX_OVERFLOW,
+)
+bulkhead_engines: Dict[str, Engine] = {
+    name: create_engine(settings.DATABASE_URL, pool_size=size, max_overflow=0)
+    for name, size in bulkhead_connections.items()
+}
+current_bulkhead: ContextVar[Optional[str]] = ContextVar("current_bulkhead", default=None)
+
+class RoutingSession(Session):
+    def get_bind(self, *args, **kwargs):
+        name = current_bulkhead.get()
+        if name in bulkhead_engines and self.bind is engine:
+            return bulkhead_engines[name]
+        return super().get_bind(*args, **kwargs)
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
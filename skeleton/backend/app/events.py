@@ -0,0 +1,371 @@
+"""
+Change feed for repository writes.
+
+Writes made through BaseRepository are staged on the session as ChangeEvents
+and delivered to subscribers once the transaction commits. With the postgres
+backend events travel through LISTEN/NOTIFY so every worker sees every write;
+each worker keeps a single listener connection that fans events out to its
+local subscribers. The memory backend keeps everything in-process (tests).
+
+Event ids are allocated when a write is staged, before it commits, so they
+are unique but not in delivery order: events arrive in commit order, which
+NOTIFY guarantees to every listener. A client resuming with Last-Event-ID is
+sent everything that followed that event in the history, and a "reset" event
+when the id is no longer there, telling it to refetch.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import select
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Set
+
+import psycopg2
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "changes_"
+# Postgres rejects NOTIFY payloads of 8000 bytes or more.
+MAX_NOTIFY_PAYLOAD = 7900
+
+
+@dataclass
+class ChangeEvent:
+    id: Optional[int]
+    channel: str
+    op: str
+    pk: Any
+    data: Optional[Dict[str, Any]] = None
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "id": self.id,
+                "channel": self.channel,
+                "op": self.op,
+                "pk": self.pk,
+                "data": self.data,
+            }
+        )
+
+    @classmethod
+    def from_json(cls, payload: str) -> "ChangeEvent":
+        return cls(**json.loads(payload))
+
+    def to_sse(self) -> str:
+        body = json.dumps({"op": self.op, "pk": self.pk, "data": self.data})
+        # Without an id line the client keeps the Last-Event-ID it had.
+        id_line = f"id: {self.id}\n" if self.id is not None else ""
+        return f"{id_line}event: {self.op}\ndata: {body}\n\n"
+
+
+@dataclass(eq=False)
+class Subscription:
+    channel: str
+    loop: asyncio.AbstractEventLoop
+    queue: "asyncio.Queue[Optional[ChangeEvent]]" = field(
+        default_factory=lambda: asyncio.Queue(settings.CHANGE_FEED_QUEUE_SIZE)
+    )
+    lagging: bool = False
+
+    def push(self, change: ChangeEvent) -> None:
+        self.loop.call_soon_threadsafe(self._put, change)
+
+    def _put(self, change: Optional[ChangeEvent]) -> None:
+        if self.lagging:
+            return
+        try:
+            self.queue.put_nowait(change)
+        except asyncio.QueueFull:
+            # A slow client is cut loose rather than buffered without bound;
+            # it reconnects with Last-Event-ID and replays from history, so
+            # whatever is still queued is dropped to keep the replay gap-free.
+            self.lagging = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+# Callbacks run with a channel name as soon as a write to it commits in this
+# worker, and again when its event is dispatched (which is how writes made by
+# other workers arrive).
+change_listeners: List[Callable[[str], None]] = []
+# Callbacks run with every dispatched event, from this worker or another.
+event_listeners: List[Callable[[ChangeEvent], None]] = []
+
+
+def on_change(callback: Callable[[str], None]) -> None:
+    change_listeners.append(callback)
+
+
+def on_event(callback: Callable[[ChangeEvent], None]) -> None:
+    event_listeners.append(callback)
+
+
+def _notify_listeners(channel: str) -> None:
+    for callback in change_listeners:
+        callback(channel)
+
+
+def _mark_changed(db: Session, channel: str) -> None:
+    changed: Set[str] = db.info.setdefault("changed_channels", set())
+    changed.add(channel)
+
+
+def serialize_row(obj: Any) -> Dict[str, Any]:
+    return jsonable_encoder(
+        {column.name: getattr(obj, column.name) for column in obj.__table__.columns}
+    )
+
+
+class ChangeBroker:
+    """In-process broker: events are dispatched after the session commits."""
+
+    def __init__(self, history_size: int = 1000):
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, List[Subscription]] = {}
+        self._history: Dict[str, Deque[ChangeEvent]] = {}
+        self._history_size = history_size
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def next_id(self, db: Session) -> int:
+        return next(self._ids)
+
+    def stage(self, db: Session, change: ChangeEvent) -> None:
+        _mark_changed(db, change.channel)
+        db.info.setdefault("pending_changes", []).append(change)
+
+    def publish(self, db: Session, channel: str, op: str, obj: Any) -> None:
+        data = serialize_row(obj)
+        self.stage(db, ChangeEvent(self.next_id(db), channel, op, data["id"], data))
+
+    def dispatch(self, change: ChangeEvent) -> None:
+        with self._lock:
+            history = self._history.setdefault(
+                change.channel, deque(maxlen=self._history_size)
+            )
+            history.append(change)
+            subscribers = list(self._subscribers.get(change.channel, ()))
+        self._push(subscribers, change)
+        _notify_listeners(change.channel)
+        for callback in event_listeners:
+            callback(change)
+
+    def discontinuity(self, channels: List[str]) -> None:
+        """Record that events on these channels may have been missed.
+
+        The history is forgotten, so a client resuming from before the gap is
+        sent a reset rather than a replay that silently skips events; live
+        subscribers and listeners are told to refetch as well.
+        """
+        with self._lock:
+            for channel in channels:
+                self._history.pop(channel, None)
+            subscribers = {
+                channel: list(self._subscribers.get(channel, ())) for channel in channels
+            }
+        for channel in channels:
+            reset = ChangeEvent(None, channel, "reset", None)
+            self._push(subscribers[channel], reset)
+            _notify_listeners(channel)
+            for callback in event_listeners:
+                callback(reset)
+
+    def _push(self, subscribers: List[Subscription], change: ChangeEvent) -> None:
+        for subscription in subscribers:
+            try:
+                subscription.push(change)
+            except RuntimeError:
+                # Its event loop has closed; nobody is reading the queue.
+                self.unsubscribe(subscription)
+
+    def history(self, channel: str) -> List[ChangeEvent]:
+        with self._lock:
+            return list(self._history.get(channel, ()))
+
+    def subscribe(
+        self, channel: str, last_event_id: Optional[int] = None
+    ) -> Subscription:
+        subscription = Subscription(channel, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(channel, []).append(subscription)
+            if last_event_id is not None:
+                for change in self._replay(channel, last_event_id):
+                    subscription._put(change)
+        return subscription
+
+    def _replay(self, channel: str, last_event_id: int) -> List[ChangeEvent]:
+        # Ids are not in commit order, so replay by position in the history.
+        history = list(self._history.get(channel, ()))
+        for position in range(len(history) - 1, -1, -1):
+            if history[position].id == last_event_id:
+                return history[position + 1 :]
+        # The event has aged out of the history (or was never seen by this
+        # worker): whatever the client missed cannot be replayed.
+        latest = history[-1].id if history else None
+        return [ChangeEvent(latest, channel, "reset", None)]
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel, [])
+            if subscription in subscribers:
+                subscribers.remove(subscription)
+
+
+class PostgresChangeBroker(ChangeBroker):
+    """Fans events out across workers through LISTEN/NOTIFY."""
+
+    def __init__(self, dsn: str, channels: List[str], history_size: int = 1000):
+        super().__init__(history_size)
+        self._dsn = dsn
+        self._channels = channels
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        # Event ids come from a shared sequence so they are comparable across
+        # workers, which is what lets a client resume on any of them.
+        connection = psycopg2.connect(self._dsn)
+        try:
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute("CREATE SEQUENCE IF NOT EXISTS change_event_id_seq")
+        finally:
+            connection.close()
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._listen, name="change-feed-listener", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def next_id(self, db: Session) -> int:
+        return db.execute(text("SELECT nextval('change_event_id_seq')")).scalar_one()
+
+    def stage(self, db: Session, change: ChangeEvent) -> None:
+        _mark_changed(db, change.channel)
+        payload = change.to_json()
+        if len(payload.encode()) > MAX_NOTIFY_PAYLOAD:
+            # Oversized rows are announced without a body; clients refetch.
+            change.data = None
+            payload = change.to_json()
+        # NOTIFY is transactional: nothing is delivered unless the write commits.
+        db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": CHANNEL_PREFIX + change.channel, "payload": payload},
+        )
+
+    def _listen(self) -> None:
+        backoff = 1.0
+        connected_before = False
+        while not self._stopping.is_set():
+            try:
+                connection = psycopg2.connect(self._dsn)
+            except psycopg2.Error:
+                logger.exception("change feed listener could not connect")
+                self._stopping.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+                continue
+            backoff = 1.0
+            try:
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    for channel in self._channels:
+                        cursor.execute(f'LISTEN "{CHANNEL_PREFIX}{channel}"')
+                # Notifications sent while the connection was down are lost.
+                if connected_before:
+                    self.discontinuity(self._channels)
+                connected_before = True
+                while not self._stopping.is_set():
+                    if select.select([connection], [], [], 1.0) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        notify = connection.notifies.pop(0)
+                        try:
+                            self.dispatch(ChangeEvent.from_json(notify.payload))
+                        except Exception:
+                            # One bad payload or listener must not stop the feed.
+                            logger.exception(
+                                "change feed could not handle %r", notify.payload
+                            )
+            except psycopg2.Error:
+                logger.exception("change feed listener lost its connection")
+            finally:
+                connection.close()
+
+
+def _create_broker() -> ChangeBroker:
+    if settings.CHANGE_FEED_BACKEND == "postgres":
+        return PostgresChangeBroker(
+            settings.DATABASE_URL,
+            channels=["items", "users"],
+            history_size=settings.CHANGE_FEED_HISTORY,
+        )
+    return ChangeBroker(history_size=settings.CHANGE_FEED_HISTORY)
+
+
+broker = _create_broker()
+
+
+def get_broker() -> ChangeBroker:
+    return broker
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_pending(db: Session) -> None:
+    for channel in db.info.pop("changed_channels", ()):
+        _notify_listeners(channel)
+    for change in db.info.pop("pending_changes", []):
+        broker.dispatch(change)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(db: Session) -> None:
+    db.info.pop("changed_channels", None)
+    db.info.pop("pending_changes", None)
+
+
+async def event_stream(
+    request: Request, channel: str, last_event_id: Optional[int] = None
+) -> AsyncIterator[str]:
+    subscription = broker.subscribe(channel, last_event_id)
+    heartbeat = settings.CHANGE_FEED_HEARTBEAT_SECONDS
+    try:
+        yield f"retry: {int(heartbeat * 1000)}\n\n"
+        while True:
+            try:
+                change = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            if change is None:
+                return
+            yield change.to_sse()
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,375 @@
+"""
+Background bulk import of items from CSV or NDJSON uploads.
+
+The upload is spooled to a temporary file as it arrives (writes run in a
+worker thread, and uploads over IMPORT_MAX_UPLOAD_BYTES are refused), then a
+background thread reads it back row by row: chunks of rows are validated
+against ItemCreate in a process pool while earlier chunks are loaded with
+COPY, each chunk committing together with the job's progress counters. Rows
+naming an owner that does not exist are rejected one by one; the owners of
+the rest are locked FOR KEY SHARE until the chunk commits, so a concurrent
+user delete cannot fail the COPY.
+
+A process holds an advisory lock on every job it owns. Jobs still queued at
+shutdown are marked failed, and at startup any pending or running job whose
+lock nobody holds (its process is gone) is marked failed too.
+"""
+
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+import anyio
+from fastapi import Request
+from pydantic import ValidationError
+from sqlalchemy import select, text, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.events import ChangeEvent, get_broker
+from app.models.import_job import ImportJob
+from app.models.user import User
+from app.schemas.item import ItemCreate
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+ITEM_COLUMNS = ("title", "description", "is_active", "owner_id")
+# Rejections beyond this many are counted but their details are dropped.
+MAX_REPORTED_ERRORS = 100
+# First key of the advisory locks held on import jobs (the second is the id).
+JOB_LOCK_CLASS = 28341
+
+Row = Tuple[int, Any]
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+async def spool_upload(request: Request) -> str:
+    """Write the request body to a temporary file without holding it in memory.
+
+    Raises UploadTooLarge once the body exceeds IMPORT_MAX_UPLOAD_BYTES.
+    """
+    limit = settings.IMPORT_MAX_UPLOAD_BYTES
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > limit:
+        raise UploadTooLarge()
+    spool = await anyio.to_thread.run_sync(
+        lambda: tempfile.NamedTemporaryFile(prefix="import-", suffix=".upload", delete=False)
+    )
+    try:
+        async with anyio.wrap_file(spool) as handle:
+            received = 0
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > limit:
+                    raise UploadTooLarge()
+                await handle.write(chunk)
+    except BaseException:
+        os.unlink(spool.name)
+        raise
+    return spool.name
+
+
+def read_rows(path: str, format: str) -> Iterator[Row]:
+    """Yield (line number, row) pairs; undecodable rows are yielded as str."""
+    with open(path, encoding="utf-8-sig", newline="") as handle:
+        if format == "csv":
+            reader = csv.DictReader(handle)
+            for row in reader:
+                # Blank cells are left out so the field's default applies (a
+                # blank title is reported missing); cells beyond the header
+                # are ignored.
+                yield reader.line_num, {
+                    k: v for k, v in row.items() if k is not None and v != ""
+                }
+            return
+        for line_number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as e:
+                yield line_number, f"invalid JSON: {e}"
+
+
+def validate_rows(rows: List[Row]) -> Tuple[List[Tuple[int, Tuple]], List[Dict[str, Any]]]:
+    """Validate a chunk against ItemCreate; runs inside the process pool.
+
+    Valid rows come back as (line number, values in ITEM_COLUMNS order).
+    """
+    valid = []
+    rejected = []
+    for line, row in rows:
+        if isinstance(row, str):
+            rejected.append({"line": line, "error": row})
+            continue
+        try:
+            item = ItemCreate.model_validate(row)
+        except ValidationError as e:
+            message = "; ".join(
+                f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                for error in e.errors()
+            )
+            rejected.append({"line": line, "error": message})
+            continue
+        valid.append((line, (item.title, item.description, item.is_active, item.owner_id)))
+    return valid, rejected
+
+
+def chunked(rows: Iterator[Row], size: int) -> Iterator[List[Row]]:
+    chunk: List[Row] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def reject_unknown_owners(
+    db: Session, rows: List[Tuple[int, Tuple]]
+) -> Tuple[List[Tuple[int, Tuple]], List[Dict[str, Any]]]:
+    """Split off rows whose owner does not exist, locking the owners that do."""
+    owner_ids = {values[-1] for _, values in rows if values[-1] is not None}
+    if not owner_ids:
+        return rows, []
+    existing = set(
+        db.scalars(
+            select(User.id).where(User.id.in_(owner_ids)).with_for_update(key_share=True)
+        )
+    )
+    valid = []
+    rejected = []
+    for line, values in rows:
+        if values[-1] is None or values[-1] in existing:
+            valid.append((line, values))
+        else:
+            rejected.append({"line": line, "error": "owner_id: Owner not found"})
+    return valid, rejected
+
+
+def copy_items(db: Session, rows: List[Tuple]) -> None:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY items ({', '.join(ITEM_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+class ImportRunner:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._jobs: Optional[Executor] = None
+        self._validators: Optional[Executor] = None
+        self._futures: Dict[int, Future] = {}
+        self._claims: Optional[Connection] = None
+
+    def _executors(self) -> Tuple[Executor, Executor]:
+        with self._lock:
+            if self._jobs is None:
+                self._jobs = ThreadPoolExecutor(
+                    settings.IMPORT_MAX_CONCURRENT_JOBS, thread_name_prefix="import-job"
+                )
+            if self._validators is None:
+                if settings.IMPORT_VALIDATION_WORKERS > 0:
+                    self._validators = ProcessPoolExecutor(
+                        settings.IMPORT_VALIDATION_WORKERS,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                else:
+                    self._validators = ThreadPoolExecutor(1)
+            return self._jobs, self._validators
+
+    def start(self) -> None:
+        """Fail jobs interrupted by a previous process, in the background."""
+        jobs, _ = self._executors()
+        jobs.submit(self._recover_logged)
+
+    def submit(self, job_id: int, path: str, format: str) -> Future:
+        jobs, _ = self._executors()
+        self._claim(job_id)
+        future = jobs.submit(self.run, job_id, path, format)
+        self._futures[job_id] = future
+        future.add_done_callback(lambda done: self._finished(job_id, path, done))
+        return future
+
+    def _finished(self, job_id: int, path: str, future: Future) -> None:
+        self._futures.pop(job_id, None)
+        try:
+            if future.cancelled():
+                # Never started, so run() did not get to clean up.
+                os.unlink(path)
+                self._set_status(
+                    job_id, "failed", finished_at=_now(), detail="cancelled at shutdown"
+                )
+        except Exception:
+            logger.exception("could not fail cancelled import job %s", job_id)
+        finally:
+            self._release(job_id)
+
+    def recover(self) -> List[int]:
+        """Fail pending or running jobs that no live process holds."""
+        with SessionLocal() as db:
+            job_ids = db.scalars(
+                select(ImportJob.id).where(ImportJob.status.in_(("pending", "running")))
+            ).all()
+        failed = []
+        for job_id in job_ids:
+            if not self._claim(job_id):
+                continue
+            try:
+                self._set_status(
+                    job_id, "failed", finished_at=_now(), detail="interrupted by a restart"
+                )
+                failed.append(job_id)
+            finally:
+                self._release(job_id)
+        if failed:
+            logger.warning("failed interrupted import jobs %s", failed)
+        return failed
+
+    def _recover_logged(self) -> None:
+        try:
+            self.recover()
+        except Exception:
+            logger.exception("recovering interrupted import jobs failed")
+
+    def _claim(self, job_id: int) -> bool:
+        # One connection holds the locks; they go away with the process.
+        with self._lock:
+            if self._claims is None:
+                bind = SessionLocal.kw["bind"]
+                self._claims = bind.connect().execution_options(isolation_level="AUTOCOMMIT")
+            return bool(
+                self._claims.execute(
+                    text("SELECT pg_try_advisory_lock(:lock_class, :job_id)"),
+                    {"lock_class": JOB_LOCK_CLASS, "job_id": job_id},
+                ).scalar()
+            )
+
+    def _release(self, job_id: int) -> None:
+        with self._lock:
+            if self._claims is not None:
+                self._claims.execute(
+                    text("SELECT pg_advisory_unlock(:lock_class, :job_id)"),
+                    {"lock_class": JOB_LOCK_CLASS, "job_id": job_id},
+                )
+
+    def wait(self, job_id: int, timeout: Optional[float] = None) -> None:
+        future = self._futures.get(job_id)
+        if future is not None:
+            future.result(timeout)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executors = (self._jobs, self._validators)
+            self._jobs = self._validators = None
+        # Queued jobs are cancelled, which fails them (see _finished).
+        for executor in executors:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, job_id: int, path: str, format: str) -> None:
+        try:
+            self._set_status(job_id, "running", started_at=_now())
+            self._load(job_id, path, format)
+            self._set_status(job_id, "completed", finished_at=_now())
+        except Exception as e:
+            logger.exception("import job %s failed", job_id)
+            self._set_status(job_id, "failed", finished_at=_now(), detail=str(e))
+        finally:
+            os.unlink(path)
+
+    def _load(self, job_id: int, path: str, format: str) -> None:
+        _, validators = self._executors()
+        # Keep a few chunks in flight so validation overlaps with COPY while
+        # the number of parsed rows held in memory stays bounded.
+        pending: Deque[Tuple[int, Future]] = deque()
+        depth = max(settings.IMPORT_VALIDATION_WORKERS, 1) * 2
+        reported = 0
+        for chunk in chunked(read_rows(path, format), settings.IMPORT_CHUNK_SIZE):
+            pending.append((len(chunk), validators.submit(validate_rows, chunk)))
+            if len(pending) >= depth:
+                size, future = pending.popleft()
+                reported = self._commit_chunk(job_id, size, future, reported)
+        while pending:
+            size, future = pending.popleft()
+            reported = self._commit_chunk(job_id, size, future, reported)
+
+    def _commit_chunk(
+        self, job_id: int, size: int, future: Future, reported: int
+    ) -> int:
+        valid, rejected = future.result()
+        with SessionLocal() as db:
+            valid, orphaned = reject_unknown_owners(db, valid)
+            rejected = sorted(rejected + orphaned, key=lambda error: error["line"])
+            errors = rejected[: max(MAX_REPORTED_ERRORS - reported, 0)]
+            if valid:
+                copy_items(db, [values for _, values in valid])
+                broker = get_broker()
+                broker.stage(
+                    db,
+                    ChangeEvent(
+                        broker.next_id(db),
+                        "items",
+                        "import",
+                        None,
+                        {"job_id": job_id, "rows": len(valid)},
+                    ),
+                )
+            values: Dict[str, Any] = {
+                "rows_processed": ImportJob.rows_processed + size,
+                "rows_rejected": ImportJob.rows_rejected + len(rejected),
+            }
+            job = db.get(ImportJob, job_id)
+            if errors and job is not None:
+                values["errors"] = (job.errors or []) + errors
+            db.execute(update(ImportJob).where(ImportJob.id == job_id).values(**values))
+            db.commit()
+        return reported + len(errors)
+
+    def _set_status(self, job_id: int, status: str, **values: Any) -> None:
+        with SessionLocal() as db:
+            db.execute(
+                update(ImportJob)
+                .where(ImportJob.id == job_id)
+                .values(status=status, **values)
+            )
+            db.commit()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+runner = ImportRunner()
+
+
+def get_runner() -> ImportRunner:
+    return runner
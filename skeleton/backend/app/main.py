@@ -2,6 +2,13 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.api.v1.api import api_router
+from app import bulkheads, coalescing, compression
+from app.bloom import get_email_filter
+from app.coalescing import CoalescingMiddleware
+from app.compression import CompressionMiddleware
+from app.events import get_broker
+from app.importer import get_runner
+from app.partitions import maintenance as partition_maintenance
 
 app = FastAPI(
     title="FastAPI Skeleton",
@@ -18,8 +25,55 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses (coalescing, added below, wraps this so followers reuse the
+# compressed body)
+app.add_middleware(CompressionMiddleware)
+
+# Share one in-flight response between identical concurrent reads
+if settings.REQUEST_COALESCING:
+    app.add_middleware(
+        CoalescingMiddleware,
+        routes={
+            r"/api/v1/items/(\d+)?": ("items", "users"),
+            r"/api/v1/users/(\d+)?": ("users", "items"),
+        },
+    )
+
 app.include_router(api_router, prefix="/api/v1")
 
+@app.on_event("startup")
+def start_change_feed():
+    get_broker().start()
+
+@app.on_event("shutdown")
+def stop_change_feed():
+    get_broker().stop()
+
+@app.on_event("startup")
+def recover_imports():
+    if settings.IMPORT_RECOVER_ON_STARTUP:
+        get_runner().start()
+
+@app.on_event("shutdown")
+def stop_imports():
+    get_runner().shutdown()
+
+@app.on_event("startup")
+def build_email_filter():
+    get_email_filter().start()
+
+@app.on_event("startup")
+def start_partition_maintenance():
+    partition_maintenance.start()
+
+@app.on_event("shutdown")
+def stop_email_filter():
+    get_email_filter().stop()
+
+@app.on_event("shutdown")
+def stop_partition_maintenance():
+    partition_maintenance.stop()
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to FastAPI Skeleton"}
@@ -27,3 +81,12 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+@app.get("/metrics")
+def metrics():
+    return {
+        "bulkheads": bulkheads.stats(),
+        "coalescing": coalescing.stats(),
+        "compression": compression.stats(),
+        "email_filter": get_email_filter().stats(),
+    }
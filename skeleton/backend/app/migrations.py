@@ -0,0 +1,219 @@
+"""
+Lock-safe helpers for migrations against large tables.
+
+Use these from alembic/versions scripts instead of the plain op.* calls when a
+table is too big to lock for the length of a migration:
+
+    from app.migrations import backfill, create_index_concurrently
+
+    def upgrade():
+        op.add_column("items", sa.Column("slug", sa.String(), nullable=True))
+        create_index_concurrently("ix_items_slug", "items", ["slug"])
+        backfill("items", "slug", "lower(title)", where="slug IS NULL")
+
+Both helpers run outside the migration transaction, so they commit whatever
+the migration did before them. Run `alembic -x dry_run=true upgrade head`
+(`make migrate-plan`) to print the plan without touching the database.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+from alembic import op
+from sqlalchemy import text
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def is_dry_run() -> bool:
+    # alembic/env.py maps `-x dry_run=true` onto this variable.
+    return os.getenv("MIGRATION_DRY_RUN", "").lower() in ("1", "true", "yes")
+
+
+def connect_options() -> str:
+    """libpq options applying the default migration timeouts to a connection."""
+    return (
+        f"-c lock_timeout={settings.MIGRATION_LOCK_TIMEOUT} "
+        f"-c statement_timeout={settings.MIGRATION_STATEMENT_TIMEOUT}"
+    )
+
+
+def _plan(statement: str) -> None:
+    print(f"[dry-run] {statement}")
+
+
+@contextmanager
+def timeouts(
+    lock_timeout: Optional[str] = None, statement_timeout: Optional[str] = None
+) -> Iterator[None]:
+    """Override the session timeouts for the statements inside the block.
+
+    The values in effect before the block are restored afterwards, so nested
+    overrides and timeouts set by the caller survive.
+    """
+    overrides = {
+        name: value
+        for name, value in (
+            ("lock_timeout", lock_timeout),
+            ("statement_timeout", statement_timeout),
+        )
+        if value is not None
+    }
+    previous = {name: _show(name) for name in overrides}
+    for name, value in overrides.items():
+        _execute(f"SET {name} = '{value}'")
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            _execute(f"SET {name} = '{value}'")
+
+
+def _show(name: str) -> str:
+    if is_dry_run():
+        return f"<current {name}>"
+    return str(op.get_bind().execute(text(f"SHOW {name}")).scalar())
+
+
+def _execute(statement: str) -> None:
+    if is_dry_run():
+        _plan(statement)
+    else:
+        op.execute(statement)
+
+
+def create_index_concurrently(
+    index_name: str,
+    table_name: str,
+    columns: List[str],
+    *,
+    unique: bool = False,
+    where: Optional[str] = None,
+) -> None:
+    """CREATE INDEX CONCURRENTLY outside the migration transaction.
+
+    A previous failed attempt leaves an INVALID index behind; it is dropped
+    and rebuilt so the migration can simply be re-run.
+    """
+    statement = (
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY IF NOT EXISTS "
+        f"{index_name} ON {table_name} ({', '.join(columns)})"
+    )
+    if where:
+        statement += f" WHERE {where}"
+    if is_dry_run():
+        _plan(statement)
+        return
+
+    with op.get_context().autocommit_block():
+        if _index_is_invalid(index_name):
+            logger.warning("dropping invalid index %s left by a failed build", index_name)
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
+        # Building the index may take far longer than any sane statement
+        # timeout; the lock timeout still guards the brief lock it takes.
+        with timeouts(statement_timeout="0"):
+            started = time.monotonic()
+            op.execute(statement)
+        logger.info("built %s in %.1fs", index_name, time.monotonic() - started)
+
+
+def drop_index_concurrently(index_name: str) -> None:
+    statement = f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}"
+    if is_dry_run():
+        _plan(statement)
+        return
+    with op.get_context().autocommit_block():
+        op.execute(statement)
+
+
+def _index_is_invalid(index_name: str) -> bool:
+    return bool(
+        op.get_bind()
+        .execute(
+            text(
+                "SELECT NOT indisvalid FROM pg_index "
+                "WHERE indexrelid = to_regclass(:name)"
+            ),
+            {"name": index_name},
+        )
+        .scalar()
+    )
+
+
+def backfill(
+    table_name: str,
+    column: str,
+    value: str,
+    *,
+    where: Optional[str] = None,
+    key: str = "id",
+    batch_size: Optional[int] = None,
+    pause: Optional[float] = None,
+) -> int:
+    """Set `column` to the SQL expression `value` in keyset-ordered batches.
+
+    Each batch commits on its own so row locks are held only briefly, and the
+    loop sleeps `pause` seconds between batches to leave room for replication
+    and regular traffic. Returns the number of rows updated.
+    """
+    batch_size = batch_size or settings.MIGRATION_BATCH_SIZE
+    pause = settings.MIGRATION_BATCH_PAUSE if pause is None else pause
+    condition = f"(:last_key IS NULL OR {key} > :last_key)"
+    if where:
+        condition += f" AND ({where})"
+    statement = (
+        f"WITH batch AS (SELECT {key} AS batch_key FROM {table_name} "
+        f"WHERE {condition} ORDER BY {key} LIMIT :batch_size) "
+        f"UPDATE {table_name} SET {column} = {value} FROM batch "
+        f"WHERE {table_name}.{key} = batch.batch_key RETURNING {table_name}.{key}"
+    )
+    if is_dry_run():
+        _plan(f"{statement} -- repeated in batches of {batch_size}, pausing {pause}s")
+        return 0
+    if op.get_context().as_sql:
+        raise RuntimeError(
+            "backfill needs a live connection; use -x dry_run=true to preview it"
+        )
+
+    bind = op.get_bind()
+    # The planner's row estimate is good enough for progress reporting and,
+    # unlike count(*), does not scan the whole table first.
+    estimate = bind.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": table_name},
+    ).scalar()
+    updated = 0
+    last_key = None
+    started = time.monotonic()
+    with op.get_context().autocommit_block():
+        while True:
+            keys = (
+                bind.execute(
+                    text(statement),
+                    {"last_key": last_key, "batch_size": batch_size},
+                )
+                .scalars()
+                .all()
+            )
+            if not keys:
+                break
+            updated += len(keys)
+            last_key = max(keys)
+            elapsed = time.monotonic() - started
+            logger.info(
+                "backfill %s.%s: %d/~%d rows (%.0f rows/s)",
+                table_name,
+                column,
+                updated,
+                max(estimate or 0, updated),
+                updated / elapsed if elapsed else 0,
+            )
+            if len(keys) < batch_size:
+                break
+            time.sleep(pause)
+    return updated
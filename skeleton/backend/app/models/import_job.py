@@ -0,0 +1,28 @@
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON
+from sqlalchemy.sql import func
+from app.database import Base
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    target = Column(String, nullable=False)
+    format = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="pending")
+    rows_processed = Column(Integer, nullable=False, default=0)
+    rows_rejected = Column(Integer, nullable=False, default=0)
+    errors = Column(JSON, nullable=True)
+    detail = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    @property
+    def throughput(self) -> float:
+        """Rows processed per second since the job started."""
+        if not self.started_at:
+            return 0.0
+        end = self.finished_at or datetime.now(timezone.utc)
+        elapsed = (end - self.started_at).total_seconds()
+        return round(self.rows_processed / elapsed, 1) if elapsed > 0 else 0.0
@@ -1,13 +1,45 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Index, event
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from app.config import settings
 from app.database import Base
 
 class Item(Base):
     __tablename__ = "items"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     title = Column(String, index=True, nullable=False)
     description = Column(Text, nullable=True)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    owner_id = Column(
+        Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True
+    )
+    # When partitioned (see app/partitions.py) created_at is the partition key
+    # and so has to be part of the table's primary key.
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        primary_key=settings.ITEMS_PARTITIONED,
+    )
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Never lazy loaded: callers ask for the owner with selectinload.
+    owner = relationship("User", back_populates="items", lazy="raise")
+
+    __table_args__ = (
+        # Active-only list pages (BaseRepository.get_multi)
+        Index(
+            "ix_items_active_created_at", created_at, id, postgresql_where=is_active
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"}
+        if settings.ITEMS_PARTITIONED
+        else {},
+    )
+    # Rows are still identified by id alone.
+    __mapper_args__ = {"primary_key": [id]}
+
+@event.listens_for(Item.__table__, "after_create")
+def create_initial_partitions(target, connection, **kw):
+    if settings.ITEMS_PARTITIONED:
+        from app.partitions import ensure_partitions
+        ensure_partitions(connection)
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -12,3 +13,17 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        # Case-insensitive lookups (UserRepository.email_exists)
+        Index("ix_users_email_lower", func.lower(email)),
+        # Active-only list pages and lookups
+        Index(
+            "ix_users_active_created_at", created_at, id, postgresql_where=is_active
+        ),
+        Index("ix_users_active_email", email, postgresql_where=is_active),
+    )
+
+    # Never lazy loaded (see UserRepository.load_items); deleting a user
+    # leaves the SET NULL of owner_id to the database.
+    items = relationship("Item", back_populates="owner", lazy="raise", passive_deletes=True)
@@ -0,0 +1,297 @@
+"""
+Monthly range partitions for the items table.
+
+With ITEMS_PARTITIONED enabled, items is partitioned by created_at into one
+partition per month (items_pYYYYMM). Partitions for the next
+ITEMS_PARTITION_MONTHS_AHEAD months are created at startup and then daily, so
+inserts never run past the last partition; there is deliberately no DEFAULT
+partition because it would prevent detaching partitions concurrently.
+
+Old partitions are archived by detaching them (metadata only) and moving them
+to the `archive` schema, or dropping them:
+
+    python -m app.partitions ensure
+    python -m app.partitions archive --before 2025-01-01 [--drop]
+"""
+
+import argparse
+import logging
+import re
+import threading
+from datetime import date, datetime, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.config import settings
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+TABLE = "items"
+ARCHIVE_SCHEMA = "archive"
+LEGACY_PARTITION = "items_legacy"
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def is_partition(table_name: str) -> bool:
+    return re.fullmatch(rf"{TABLE}_(p\d{{6}}|legacy)", table_name) is not None
+
+
+def is_partitioned(connection: Connection) -> bool:
+    return bool(
+        connection.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table "
+                "WHERE partrelid = to_regclass(:table)"
+            ),
+            {"table": TABLE},
+        ).scalar()
+    )
+
+
+def create_partition(connection: Connection, month: date) -> str:
+    name = partition_name(month)
+    connection.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {TABLE} "
+            f"FOR VALUES FROM ('{month} 00:00:00+00') "
+            f"TO ('{add_months(month, 1)} 00:00:00+00')"
+        )
+    )
+    return name
+
+
+def ensure_partitions(
+    connection: Connection,
+    months_ahead: Optional[int] = None,
+    start: Optional[date] = None,
+) -> List[str]:
+    """Create any missing monthly partitions from `start` to the horizon."""
+    months_ahead = (
+        settings.ITEMS_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    )
+    first = month_start(start or datetime.now(timezone.utc).date())
+    # Months already inside an existing range (such as items_legacy) are
+    # skipped; creating them would overlap.
+    covered = max((upper for _, upper in list_partitions(connection) if upper), default=None)
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(first, offset)
+        if covered is None or month >= covered:
+            created.append(create_partition(connection, month))
+    return created
+
+
+def list_partitions(connection: Connection) -> List[Tuple[str, Optional[date]]]:
+    """Return (name, exclusive upper bound) for every partition of items."""
+    rows = connection.execute(
+        text(
+            "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) "
+            "FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(:table) ORDER BY 1"
+        ),
+        {"table": TABLE},
+    ).all()
+    partitions = []
+    for name, bound in rows:
+        upper = re.search(r"TO \('(\d{4}-\d{2}-\d{2})", bound or "")
+        partitions.append((name, date.fromisoformat(upper.group(1)) if upper else None))
+    return partitions
+
+
+def archive_partitions(before: date, drop: bool = False) -> List[str]:
+    """Detach every partition that ends on or before `before`.
+
+    DETACH ... CONCURRENTLY only takes a SHARE UPDATE EXCLUSIVE lock on items,
+    so reads and writes carry on; it cannot run inside a transaction block.
+    """
+    archived: List[str] = []
+    with engine.connect() as connection:
+        connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+        if not is_partitioned(connection):
+            return archived
+        connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+        for name, upper in list_partitions(connection):
+            if upper is None or upper > before:
+                continue
+            connection.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name} CONCURRENTLY"))
+            if drop:
+                connection.execute(text(f"DROP TABLE {name}"))
+            else:
+                connection.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+            logger.info("%s partition %s", "dropped" if drop else "archived", name)
+            archived.append(name)
+    return archived
+
+
+def maintain() -> List[str]:
+    with engine.begin() as connection:
+        if not is_partitioned(connection):
+            return []
+        created = ensure_partitions(connection)
+    if created:
+        logger.info("created partitions %s", ", ".join(created))
+    return created
+
+
+class PartitionMaintenance:
+    """Creates upcoming partitions at startup and then once a day."""
+
+    def __init__(self) -> None:
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if not settings.ITEMS_PARTITIONED or self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="partition-maintenance", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                maintain()
+            except Exception:
+                logger.exception("partition maintenance failed")
+            self._stopping.wait(24 * 60 * 60)
+
+
+maintenance = PartitionMaintenance()
+
+
+def convert_items_to_partitioned() -> None:
+    """Turn an existing items table into a partitioned one, online.
+
+    Meant to be called from a migration. The current table is attached as a
+    single partition (items_legacy) covering everything before next month,
+    so no rows are copied; the constraint and index that make the attach
+    instant are built beforehand without blocking writes.
+    """
+    from alembic import op
+
+    from app.migrations import backfill, create_index_concurrently, is_dry_run
+
+    cutover = add_months(month_start(datetime.now(timezone.utc).date()), 1)
+    bound = f"'{cutover} 00:00:00+00'"
+
+    backfill(TABLE, "created_at", "now()", where="created_at IS NULL")
+    # Each step commits on its own so the brief ACCESS EXCLUSIVE lock of
+    # ADD CONSTRAINT is not held through the validation scan. Validating only
+    # takes a SHARE UPDATE EXCLUSIVE lock, and the validated check lets
+    # SET NOT NULL and ATTACH PARTITION skip their own table scans.
+    with op.get_context().autocommit_block():
+        # Guarded so a migration interrupted after this point can be re-run.
+        op.execute(
+            f"DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM pg_constraint "
+            f"WHERE conname = '{LEGACY_PARTITION}_range') THEN "
+            f"ALTER TABLE {TABLE} ADD CONSTRAINT {LEGACY_PARTITION}_range "
+            f"CHECK (created_at IS NOT NULL AND created_at < {bound}) NOT VALID; "
+            f"END IF; END $$"
+        )
+        op.execute(f"ALTER TABLE {TABLE} VALIDATE CONSTRAINT {LEGACY_PARTITION}_range")
+        op.execute(f"ALTER TABLE {TABLE} ALTER COLUMN created_at SET NOT NULL")
+    create_index_concurrently(
+        f"{LEGACY_PARTITION}_id_created_at", TABLE, ["id", "created_at"], unique=True
+    )
+
+    # The swap itself runs in the migration's transaction and is metadata only.
+    op.execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY_PARTITION}")
+    # Re-key the table on (id, created_at) using the index built above, so
+    # ATTACH adopts it as the partition's primary key instead of building one.
+    op.execute(
+        f"ALTER TABLE {LEGACY_PARTITION} DROP CONSTRAINT {TABLE}_pkey, "
+        f"ADD CONSTRAINT {LEGACY_PARTITION}_pkey PRIMARY KEY "
+        f"USING INDEX {LEGACY_PARTITION}_id_created_at"
+    )
+    op.execute(f"ALTER INDEX ix_{TABLE}_id RENAME TO {LEGACY_PARTITION}_id_idx")
+    op.execute(f"ALTER INDEX ix_{TABLE}_title RENAME TO {LEGACY_PARTITION}_title_idx")
+    op.execute(
+        f"CREATE TABLE {TABLE} (LIKE {LEGACY_PARTITION} INCLUDING DEFAULTS) "
+        f"PARTITION BY RANGE (created_at)"
+    )
+    op.execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id, created_at)")
+    op.execute(
+        f"ALTER TABLE {TABLE} ATTACH PARTITION {LEGACY_PARTITION} "
+        f"FOR VALUES FROM (MINVALUE) TO ({bound})"
+    )
+    op.execute(f"ALTER TABLE {LEGACY_PARTITION} DROP CONSTRAINT {LEGACY_PARTITION}_range")
+    # Matching indexes on the legacy partition are attached, not rebuilt.
+    op.execute(f"CREATE INDEX ix_{TABLE}_id ON {TABLE} (id)")
+    op.execute(f"CREATE INDEX ix_{TABLE}_title ON {TABLE} (title)")
+    op.execute(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+    if not is_dry_run():
+        ensure_partitions(op.get_bind(), start=cutover)
+
+
+def revert_items_to_plain() -> None:
+    """Undo convert_items_to_partitioned: make items a plain table again.
+
+    items_legacy is detached and the rows of the monthly partitions are copied
+    back into it before it takes the items name and its original id primary
+    key again. The copy holds the migration's locks for as long as it runs, so
+    archive what is not needed first; partitions already in the archive
+    schema are left there.
+    """
+    from alembic import op
+
+    from app.migrations import create_index_concurrently
+
+    # Built ahead, without blocking writes, to become the id primary key.
+    create_index_concurrently(f"{TABLE}_id_key", LEGACY_PARTITION, ["id"], unique=True)
+
+    op.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {LEGACY_PARTITION}")
+    op.execute(f"INSERT INTO {LEGACY_PARTITION} SELECT * FROM {TABLE}")
+    # Dropping the partitioned table would take the sequence with it.
+    op.execute(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY {LEGACY_PARTITION}.id")
+    op.execute(f"DROP TABLE {TABLE}")
+    op.execute(f"ALTER TABLE {LEGACY_PARTITION} RENAME TO {TABLE}")
+    op.execute(
+        f"ALTER TABLE {TABLE} DROP CONSTRAINT {LEGACY_PARTITION}_pkey, "
+        f"ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY USING INDEX {TABLE}_id_key"
+    )
+    op.execute(f"ALTER INDEX {LEGACY_PARTITION}_id_idx RENAME TO ix_{TABLE}_id")
+    op.execute(f"ALTER INDEX {LEGACY_PARTITION}_title_idx RENAME TO ix_{TABLE}_title")
+    op.execute(f"ALTER TABLE {TABLE} ALTER COLUMN created_at DROP NOT NULL")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage items partitions")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("ensure", help="create upcoming monthly partitions")
+    archive = commands.add_parser("archive", help="detach old partitions")
+    archive.add_argument("--before", type=date.fromisoformat, required=True)
+    archive.add_argument("--drop", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "ensure":
+        maintain()
+    else:
+        archive_partitions(args.before, drop=args.drop)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,63 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from datetime import datetime
+from typing import Any, Dict, Generic, List, Optional, Sequence, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from app.database import Base
+from app.events import get_broker
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # Repositories whose table has a change feed (app/events.py) set this.
+    publishes_changes = False
+
     def __init__(self, model: Type[ModelType], db: Session):
         self.model = model
         self.db = db
 
-    def get(self, id: Any) -> Optional[ModelType]:
-        return self.db.query(self.model).filter(self.model.id == id).first()
+    def get(self, id: Any, *, options: Sequence[Any] = ()) -> Optional[ModelType]:
+        return (
+            self.db.query(self.model).options(*options).filter(self.model.id == id).first()
+        )
 
     def get_multi(
-        self, *, skip: int = 0, limit: int = 100
+        self,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        options: Sequence[Any] = (),
+        active_only: bool = True,
     ) -> List[ModelType]:
-        return self.db.query(self.model).offset(skip).limit(limit).all()
+        # options are loader options such as selectinload(), for relations
+        # the caller is about to serialize.
+        query = self.db.query(self.model).options(*options)
+        if active_only and hasattr(self.model, "is_active"):
+            # A bare `WHERE is_active` (not `IS TRUE`) so the planner can use
+            # the partial indexes built WHERE is_active.
+            query = query.filter(self.model.is_active)
+        # Bounds on created_at let Postgres prune partitions of partitioned tables
+        if created_after is not None:
+            query = query.filter(self.model.created_at >= created_after)
+        if created_before is not None:
+            query = query.filter(self.model.created_at < created_before)
+        if hasattr(self.model, "created_at"):
+            query = query.order_by(self.model.created_at, self.model.id)
+        return query.offset(skip).limit(limit).all()
 
     def create(self, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)
         self.db.add(db_obj)
+        self.db.flush()
+        self._publish("create", db_obj)
         self.db.commit()
         self.db.refresh(db_obj)
+        self._committed("create", db_obj)
         return db_obj
 
     def update(
@@ -44,13 +75,26 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             if field in update_data:
                 setattr(db_obj, field, update_data[field])
         self.db.add(db_obj)
+        self.db.flush()
+        self._publish("update", db_obj)
         self.db.commit()
         self.db.refresh(db_obj)
+        self._committed("update", db_obj)
         return db_obj
 
     def delete(self, *, id: int) -> ModelType:
         obj = self.db.query(self.model).get(id)
         if obj:
+            self._publish("delete", obj)
             self.db.delete(obj)
             self.db.commit()
+            self._committed("delete", obj)
         return obj
+
+    def _publish(self, op: str, db_obj: ModelType) -> None:
+        if not self.publishes_changes:
+            return
+        get_broker().publish(self.db, self.model.__tablename__, op, db_obj)
+
+    def _committed(self, op: str, db_obj: ModelType) -> None:
+        """Hook for repositories keeping per-worker state in step with writes."""
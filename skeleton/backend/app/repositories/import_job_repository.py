@@ -0,0 +1,8 @@
+from sqlalchemy.orm import Session
+from app.repositories.base import BaseRepository
+from app.models.import_job import ImportJob
+from app.schemas.import_job import ImportJobCreate, ImportJobUpdate
+
+class ImportJobRepository(BaseRepository[ImportJob, ImportJobCreate, ImportJobUpdate]):
+    def __init__(self, db: Session):
+        super().__init__(ImportJob, db)
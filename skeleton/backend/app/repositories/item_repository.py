@@ -4,6 +4,8 @@ from app.models.item import Item
 from app.schemas.item import ItemCreate, ItemUpdate
 
 class ItemRepository(BaseRepository[Item, ItemCreate, ItemUpdate]):
+    publishes_changes = True
+
     def __init__(self, db: Session):
         super().__init__(Item, db)
     
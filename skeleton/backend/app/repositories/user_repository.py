@@ -1,11 +1,61 @@
-from sqlalchemy.orm import Session
+from collections import defaultdict
+from typing import Any, Dict, List
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.orm.attributes import set_committed_value
+from app.bloom import get_email_filter, normalize_email
 from app.repositories.base import BaseRepository
+from app.models.item import Item
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 
 class UserRepository(BaseRepository[User, UserCreate, UserUpdate]):
+    publishes_changes = True
+
     def __init__(self, db: Session):
         super().__init__(User, db)
     
-    def get_by_email(self, email: str):
-        return self.db.query(User).filter(User.email == email).first()
+    def get_by_email(self, email: str, active_only: bool = False):
+        query = self.db.query(User).filter(User.email == email)
+        if active_only:
+            query = query.filter(User.is_active)
+        return query.first()
+    
+    def email_exists(self, email: str) -> bool:
+        """Case-insensitive, through the ix_users_email_lower index."""
+        query = select(User.id).where(func.lower(User.email) == normalize_email(email))
+        return self.db.scalar(query.limit(1)) is not None
+    
+    def load_items(self, users: List[User], limit: int) -> None:
+        """Fill in user.items for every user with one batched query.
+
+        selectinload cannot cap the rows per parent, so this ranks each
+        owner's items and keeps the first `limit` of them (plus one, to set
+        user.items_truncated).
+        """
+        if not users:
+            return
+        ranked = (
+            select(
+                Item,
+                func.row_number()
+                .over(partition_by=Item.owner_id, order_by=Item.id)
+                .label("rank"),
+            )
+            .where(Item.owner_id.in_([user.id for user in users]))
+            .subquery()
+        )
+        item = aliased(Item, ranked)
+        rows = self.db.scalars(
+            select(item).where(ranked.c.rank <= limit + 1).order_by(item.owner_id, item.id)
+        ).all()
+        owned: Dict[Any, List[Item]] = defaultdict(list)
+        for row in rows:
+            owned[row.owner_id].append(row)
+        for user in users:
+            set_committed_value(user, "items", owned[user.id][:limit])
+            user.items_truncated = len(owned[user.id]) > limit
+    
+    def _committed(self, op: str, db_obj: User) -> None:
+        if op != "delete":
+            get_email_filter().add(str(db_obj.email))
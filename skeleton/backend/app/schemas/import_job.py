@@ -0,0 +1,28 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+class ImportJobCreate(BaseModel):
+    target: str
+    format: str
+
+class ImportJobUpdate(BaseModel):
+    status: Optional[str] = None
+    detail: Optional[str] = None
+
+class ImportJobResponse(BaseModel):
+    id: int
+    target: str
+    format: str
+    status: str
+    rows_processed: int
+    rows_rejected: int
+    throughput: float
+    errors: Optional[List[Dict[str, Any]]] = None
+    detail: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -6,6 +6,7 @@ class ItemBase(BaseModel):
     title: str
     description: Optional[str] = None
     is_active: bool = True
+    owner_id: Optional[int] = None
 
 class ItemCreate(ItemBase):
     pass
@@ -14,6 +15,7 @@ class ItemUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     is_active: Optional[bool] = None
+    owner_id: Optional[int] = None
 
 class ItemResponse(ItemBase):
     id: int
@@ -22,3 +24,15 @@ class ItemResponse(ItemBase):
 
     class Config:
         from_attributes = True
+
+class ItemOwner(BaseModel):
+    id: int
+    email: str
+    first_name: str
+    last_name: str
+
+    class Config:
+        from_attributes = True
+
+class ItemWithOwnerResponse(ItemResponse):
+    owner: Optional[ItemOwner] = None
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+from app.schemas.item import ItemResponse
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -24,3 +25,12 @@ class UserResponse(UserBase):
 
     class Config:
         from_attributes = True
+
+class EmailExistsResponse(BaseModel):
+    exists: bool
+
+class UserWithItemsResponse(UserResponse):
+    # At most settings.INCLUDE_MAX_ITEMS, oldest first; items_truncated is set
+    # when the user owns more than that.
+    items: List[ItemResponse] = []
+    items_truncated: bool = False
@@ -0,0 +1,184 @@
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import wait
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import importer
+from app.importer import ImportRunner, get_runner
+from app.models.import_job import ImportJob
+from tests.conftest import TEST_DATABASE_URL
+
+
+@pytest.fixture
+def import_sessions(monkeypatch, db_engine):
+    """Run import jobs against the test database on their own connections."""
+    engine = create_engine(TEST_DATABASE_URL)
+    monkeypatch.setattr(
+        "app.importer.SessionLocal", sessionmaker(autoflush=False, bind=engine)
+    )
+    monkeypatch.setattr("app.importer.settings.IMPORT_CHUNK_SIZE", 2)
+    yield
+    engine.dispose()
+
+
+def create_jobs(count: int):
+    with importer.SessionLocal() as db:
+        jobs = [ImportJob(target="items", format="csv") for _ in range(count)]
+        db.add_all(jobs)
+        db.commit()
+        return [job.id for job in jobs]
+
+
+def job_row(job_id: int) -> ImportJob:
+    with importer.SessionLocal() as db:
+        return db.get(ImportJob, job_id)
+
+
+def run_import(client: TestClient, body: str, content_type: str):
+    response = client.post(
+        "/api/v1/items/import", content=body, headers={"Content-Type": content_type}
+    )
+    assert response.status_code == 202
+    job = response.json()
+    get_runner().wait(job["id"], timeout=30)
+    return client.get(f"/api/v1/imports/{job['id']}").json()
+
+
+def test_import_csv(client: TestClient, import_sessions):
+    """Test importing items from CSV, rejecting invalid rows."""
+    body = (
+        "title,description,is_active\n"
+        "CSV Item 1,First,true\n"
+        ",Missing title,true\n"
+        "CSV Item 2,,false\n"
+        "CSV Item 3,Third,not-a-bool\n"
+        "CSV Item 4,Blank is_active,\n"
+    )
+    job = run_import(client, body, "text/csv")
+
+    assert job["status"] == "completed"
+    assert job["rows_processed"] == 5
+    assert job["rows_rejected"] == 2
+    assert [error["line"] for error in job["errors"]] == [3, 5]
+
+    items = client.get("/api/v1/items/?limit=1000&active_only=false").json()
+    active = {item["title"]: item["is_active"] for item in items}
+    assert active["CSV Item 1"] is True
+    assert active["CSV Item 2"] is False
+    # A blank cell takes the field's default rather than NULL.
+    assert active["CSV Item 4"] is True
+
+
+def test_import_ndjson(client: TestClient, import_sessions):
+    """Test importing items from NDJSON, rejecting malformed lines."""
+    lines = [json.dumps({"title": f"NDJSON Item {i}"}) for i in range(3)]
+    job = run_import(client, "\n".join(lines + ["{not json"]), "application/x-ndjson")
+
+    assert job["status"] == "completed"
+    assert job["rows_processed"] == 4
+    assert job["rows_rejected"] == 1
+    assert job["errors"][0]["line"] == 4
+
+
+def test_import_rejects_unknown_owners(client: TestClient, import_sessions):
+    """Test that rows naming a missing owner are rejected, not the whole chunk."""
+    owner = client.post(
+        "/api/v1/users/",
+        json={
+            "email": f"import-owner-{uuid4().hex}@example.com",
+            "first_name": "Import",
+            "last_name": "Owner",
+        },
+    ).json()
+    body = (
+        "title,owner_id\n"
+        f"Owned Import,{owner['id']}\n"
+        "Orphan Import,999999\n"
+    )
+    job = run_import(client, body, "text/csv")
+
+    assert job["status"] == "completed"
+    assert job["rows_rejected"] == 1
+    assert job["errors"] == [{"line": 3, "error": "owner_id: Owner not found"}]
+    items = client.get("/api/v1/items/?limit=1000&include=owner").json()
+    owners = {item["title"]: item["owner"] for item in items}
+    assert owners["Owned Import"]["id"] == owner["id"]
+    assert "Orphan Import" not in owners
+
+
+def test_import_unsupported_type(client: TestClient):
+    """Test that uploads other than CSV or NDJSON are refused."""
+    response = client.post(
+        "/api/v1/items/import", content="<xml/>", headers={"Content-Type": "text/xml"}
+    )
+    assert response.status_code == 415
+
+
+def test_import_too_large(client: TestClient, monkeypatch):
+    """Test that uploads over the size limit are refused."""
+    monkeypatch.setattr("app.importer.settings.IMPORT_MAX_UPLOAD_BYTES", 10)
+    response = client.post(
+        "/api/v1/items/import",
+        content="title\nA title longer than ten bytes\n",
+        headers={"Content-Type": "text/csv"},
+    )
+    assert response.status_code == 413
+
+
+def test_get_nonexistent_import(client: TestClient):
+    """Test getting an import job that doesn't exist."""
+    response = client.get("/api/v1/imports/99999")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Import not found"
+
+
+def test_shutdown_fails_queued_jobs(import_sessions, monkeypatch):
+    """Test that jobs still queued at shutdown are failed and their files removed."""
+    monkeypatch.setattr("app.importer.settings.IMPORT_MAX_CONCURRENT_JOBS", 1)
+    release = threading.Event()
+    monkeypatch.setattr(ImportRunner, "_load", lambda self, *args: release.wait(10))
+    running, queued = create_jobs(2)
+    paths = []
+    for _ in range(2):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        paths.append(path)
+
+    runner = ImportRunner()
+    first = runner.submit(running, paths[0], "csv")
+    runner.submit(queued, paths[1], "csv")
+    runner.shutdown()
+    release.set()
+    wait([first], timeout=10)
+    runner._claims.close()
+
+    job = job_row(queued)
+    assert job.status == "failed"
+    assert job.detail == "cancelled at shutdown"
+    assert not os.path.exists(paths[1])
+
+
+def test_recover_fails_abandoned_jobs(import_sessions):
+    """Test that startup recovery fails leftover jobs but not ones still owned."""
+    abandoned, owned = create_jobs(2)
+    owner, restarted = ImportRunner(), ImportRunner()
+    assert owner._claim(owned)
+    try:
+        failed = restarted.recover()
+    finally:
+        owner._claims.close()
+        restarted._claims.close()
+
+    assert abandoned in failed
+    assert owned not in failed
+
+    assert job_row(abandoned).status == "failed"
+    assert job_row(abandoned).detail == "interrupted by a restart"
+    assert job_row(owned).status == "pending"
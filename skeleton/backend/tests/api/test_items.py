@@ -1,3 +1,5 @@
+from uuid import uuid4
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
@@ -56,3 +58,102 @@ def test_create_item_minimal_data(client: TestClient):
     assert data["title"] == "Minimal Item"
     assert data["description"] is None
     assert data["is_active"] is True  # Default value
+
+def test_get_items_created_bounds(client: TestClient, sample_item_data):
+    """Test filtering items by a created_at range."""
+    created = client.post("/api/v1/items/", json=sample_item_data).json()
+
+    response = client.get(
+        "/api/v1/items/",
+        params={"created_after": created["created_at"], "limit": 1000},
+    )
+    assert response.status_code == 200
+    assert created["id"] in [item["id"] for item in response.json()]
+
+    response = client.get(
+        "/api/v1/items/",
+        params={"created_before": created["created_at"], "limit": 1000},
+    )
+    assert created["id"] not in [item["id"] for item in response.json()]
+
+@pytest.fixture
+def owned_items(client: TestClient):
+    """Twenty items, each with its own owner."""
+    created = []
+    for i in range(20):
+        owner = client.post(
+            "/api/v1/users/",
+            json={"email": f"owner-{uuid4().hex}@example.com", "first_name": "Owner", "last_name": str(i)},
+        ).json()
+        item = client.post(
+            "/api/v1/items/", json={"title": f"Owned Item {i}", "owner_id": owner["id"]}
+        ).json()
+        created.append((item, owner))
+    return created
+
+def test_get_items_include_owner(client: TestClient, owned_items):
+    """Test embedding each item's owner."""
+    item, owner = owned_items[-1]
+    response = client.get(
+        "/api/v1/items/",
+        params={"include": "owner", "created_after": item["created_at"], "limit": 1000},
+    )
+    assert response.status_code == 200
+    embedded = {row["id"]: row for row in response.json()}[item["id"]]
+    assert embedded["owner_id"] == owner["id"]
+    assert embedded["owner"]["email"] == owner["email"]
+
+    plain = client.get("/api/v1/items/", params={"limit": 1}).json()[0]
+    assert "owner" not in plain
+
+def test_get_items_include_owner_query_count(client: TestClient, owned_items, query_counter):
+    """Test that embedding owners costs the same queries for any page size."""
+    first, _ = owned_items[0]
+    counts = []
+    for limit in (2, 20):
+        query_counter.clear()
+        response = client.get(
+            "/api/v1/items/",
+            params={"include": "owner", "created_after": first["created_at"], "limit": limit},
+        )
+        assert response.status_code == 200
+        assert len(response.json()) == limit
+        counts.append(len(query_counter))
+    assert counts[0] == counts[1]
+
+def test_get_items_unsupported_include(client: TestClient):
+    """Test that unknown relations are refused."""
+    response = client.get("/api/v1/items/", params={"include": "owner,reviews"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unsupported include: reviews"
+
+def test_create_item_unknown_owner(client: TestClient, sample_item_data):
+    """Test creating an item for an owner that doesn't exist."""
+    response = client.post("/api/v1/items/", json={**sample_item_data, "owner_id": 99999})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Owner not found"
+
+def test_create_item_owner_deleted_concurrently(client: TestClient, monkeypatch, sample_item_data):
+    """Test that an owner vanishing after the check is still a 400, not a 500."""
+    monkeypatch.setattr(
+        "app.api.v1.endpoints.items.UserController.get_user", lambda self, user_id: True
+    )
+    response = client.post("/api/v1/items/", json={**sample_item_data, "owner_id": 99999})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Owner not found"
+
+def test_get_items_active_only(client: TestClient):
+    """Test that inactive items are left out unless asked for."""
+    first = client.post("/api/v1/items/", json={"title": "Active Item"}).json()
+    inactive = client.post("/api/v1/items/", json={"title": "Inactive Item", "is_active": False}).json()
+    params = {"created_after": first["created_at"], "limit": 1000}
+
+    active_ids = [item["id"] for item in client.get("/api/v1/items/", params=params).json()]
+    assert first["id"] in active_ids
+    assert inactive["id"] not in active_ids
+
+    all_ids = [
+        item["id"]
+        for item in client.get("/api/v1/items/", params={**params, "active_only": False}).json()
+    ]
+    assert inactive["id"] in all_ids
@@ -1,3 +1,5 @@
+from uuid import uuid4
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
@@ -54,3 +56,34 @@ def test_create_user_invalid_email(client: TestClient):
     }
     response = client.post("/api/v1/users/", json=invalid_data)
     assert response.status_code == 422  # Validation error
+
+def test_get_user_include_items(client: TestClient, monkeypatch):
+    """Test embedding a user's items, capped at INCLUDE_MAX_ITEMS."""
+    monkeypatch.setattr("app.controllers.user_controller.settings.INCLUDE_MAX_ITEMS", 2)
+    user = client.post(
+        "/api/v1/users/",
+        json={"email": f"items-{uuid4().hex}@example.com", "first_name": "Item", "last_name": "Owner"},
+    ).json()
+    items = [
+        client.post("/api/v1/items/", json={"title": f"Owned {i}", "owner_id": user["id"]}).json()
+        for i in range(3)
+    ]
+
+    data = client.get(f"/api/v1/users/{user['id']}", params={"include": "items"}).json()
+    assert [item["id"] for item in data["items"]] == [item["id"] for item in items[:2]]
+    assert data["items_truncated"] is True
+
+    plain = client.get(f"/api/v1/users/{user['id']}").json()
+    assert "items" not in plain
+
+def test_get_users_active_only(client: TestClient):
+    """Test that inactive users are left out unless asked for."""
+    user = client.post(
+        "/api/v1/users/",
+        json={"email": f"inactive-{uuid4().hex}@example.com", "first_name": "In", "last_name": "Active", "is_active": False},
+    ).json()
+    params = {"created_after": user["created_at"], "limit": 1000}
+
+    assert user["id"] not in [row["id"] for row in client.get("/api/v1/users/", params=params).json()]
+    all_users = client.get("/api/v1/users/", params={**params, "active_only": False}).json()
+    assert user["id"] in [row["id"] for row in all_users]
@@ -1,6 +1,16 @@
+import os
+
+# Keep the change feed in-process; the LISTEN/NOTIFY broker would connect to
+# settings.DATABASE_URL rather than the test database.
+os.environ.setdefault("CHANGE_FEED_BACKEND", "memory")
+# Likewise the email filter would be built from settings.DATABASE_URL;
+# tests/test_bloom.py builds one from the test database instead.
+os.environ.setdefault("EMAIL_FILTER_ENABLED", "false")
+os.environ.setdefault("IMPORT_RECOVER_ON_STARTUP", "false")
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
@@ -75,3 +85,15 @@ def sample_item_data():
         "description": "A test item description",
         "is_active": True
     }
+
+@pytest.fixture
+def query_counter():
+    """Count the statements sent to the test database."""
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    yield statements
+    event.remove(engine, "before_cursor_execute", count)
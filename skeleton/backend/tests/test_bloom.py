@@ -0,0 +1,114 @@
+import time
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.bloom import BloomFilter, EmailFilter
+from app.events import ChangeEvent
+from tests.conftest import TEST_DATABASE_URL, engine
+
+
+@pytest.fixture
+def email_filter(monkeypatch, db_engine):
+    """A filter built from the test database and used by the API."""
+    filter_engine = create_engine(TEST_DATABASE_URL)
+    monkeypatch.setattr("app.bloom.SessionLocal", sessionmaker(bind=filter_engine))
+    monkeypatch.setattr("app.bloom.settings.EMAIL_FILTER_ENABLED", True)
+    email_filter = EmailFilter()
+    monkeypatch.setattr("app.bloom.email_filter", email_filter)
+    yield email_filter
+    email_filter.stop()
+    filter_engine.dispose()
+
+
+def new_email() -> str:
+    return f"bloom-{uuid4().hex}@example.com"
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """Test that every added value is reported and few others are."""
+    bloom = BloomFilter(1000, 0.01)
+    added = [f"user{i}@example.com" for i in range(1000)]
+    for value in added:
+        bloom.add(value)
+    assert all(value in bloom for value in added)
+    false_positives = sum(f"other{i}@example.com" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_exists_is_case_insensitive(client: TestClient, email_filter):
+    """Test checking taken and free emails regardless of case."""
+    email = new_email()
+    client.post("/api/v1/users/", json={"email": email, "first_name": "A", "last_name": "B"})
+    email_filter.build()
+
+    response = client.get("/api/v1/users/exists", params={"email": email.upper()})
+    assert response.status_code == 200
+    assert response.json() == {"exists": True}
+    assert client.get("/api/v1/users/exists", params={"email": new_email()}).json() == {
+        "exists": False
+    }
+
+
+def test_negative_check_skips_database(client: TestClient, email_filter, query_counter):
+    """Test that a definite negative is answered without a query."""
+    email_filter.build()
+    query_counter.clear()
+    response = client.get("/api/v1/users/exists", params={"email": new_email()})
+    assert response.json() == {"exists": False}
+    assert query_counter == []
+    assert email_filter.stats()["negatives"] == 1
+
+
+def test_writes_keep_filter_current(client: TestClient, email_filter):
+    """Test that emails created after the build are still found."""
+    email_filter.build()
+    email = new_email()
+    client.post("/api/v1/users/", json={"email": email, "first_name": "A", "last_name": "B"})
+    assert email_filter.might_contain(email)
+
+    remote = new_email()
+    email_filter.on_event(ChangeEvent(1, "users", "create", 1, {"email": remote}))
+    assert email_filter.might_contain(remote)
+
+
+def test_local_write_is_counted_once(client: TestClient, email_filter):
+    """Test that a write seen both locally and through the feed counts once."""
+    email_filter.build()
+    before = email_filter.stats()["emails"]
+    email = new_email()
+    client.post("/api/v1/users/", json={"email": email, "first_name": "A", "last_name": "B"})
+    email_filter.on_event(ChangeEvent(1, "users", "create", 1, {"email": email}))
+    assert email_filter.stats()["emails"] == before + 1
+
+
+def test_periodic_rebuild_picks_up_unpublished_writes(monkeypatch, email_filter):
+    """Test that rows written without a change event are found after a rebuild."""
+    monkeypatch.setattr("app.bloom.settings.EMAIL_FILTER_REBUILD_SECONDS", 0.05)
+    email = new_email()
+    email_filter.start()
+    email_filter.wait(10)
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "INSERT INTO users (email, first_name, last_name, is_active) "
+                "VALUES (:email, 'Seed', 'User', true)"
+            ),
+            {"email": email},
+        )
+    deadline = time.monotonic() + 10
+    while not email_filter.might_contain(email) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert email_filter.might_contain(email)
+
+
+def test_event_without_data_invalidates_filter(email_filter):
+    """Test that the filter is not trusted when an event lost its row."""
+    email_filter.build()
+    email_filter.on_event(ChangeEvent(1, "users", "create", 1, None))
+    assert email_filter.might_contain(new_email())
+    email_filter.wait(10)
+    assert email_filter.stats()["ready"]
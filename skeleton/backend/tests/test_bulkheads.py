@@ -0,0 +1,148 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, field_validator
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.bulkheads import Bulkhead, BulkheadRoute, bulkhead, bulkheads
+from app.config import settings
+from app.database import (
+    RoutingSession,
+    bulkhead_connections,
+    bulkhead_engines,
+    current_bulkhead,
+    get_db,
+    split_connections,
+)
+from app.main import app
+from tests.conftest import TEST_DATABASE_URL
+
+
+def test_routes_run_in_their_bulkhead(client: TestClient):
+    """Test that opted-in routes are counted against their own pool."""
+    before = bulkheads["heavy"].calls
+    client.get("/api/v1/items/")
+    assert bulkheads["heavy"].calls == before + 1
+
+
+def test_metrics_reports_bulkheads(client: TestClient):
+    """Test that per-pool queue depth and wait time are exported."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    stats = response.json()["bulkheads"]
+    assert set(stats) == set(bulkheads)
+    for pool in stats.values():
+        assert {"size", "busy", "queue_depth", "wait_seconds_avg"} <= set(pool)
+
+
+def test_saturated_bulkhead_queues_without_blocking_others():
+    """Test that a full pool makes its own callers wait and no one else."""
+    heavy = Bulkhead("heavy-test", 1)
+    reads = Bulkhead("reads-test", 1)
+    release = threading.Event()
+
+    async def scenario():
+        slow = asyncio.ensure_future(heavy.run(release.wait))
+        queued = asyncio.ensure_future(heavy.run(lambda: "queued"))
+        await asyncio.sleep(0.05)
+        assert heavy.stats()["queue_depth"] == 1
+        assert await reads.run(current_bulkhead.get) == "reads-test"
+        release.set()
+        return await slow, await queued
+
+    assert asyncio.run(scenario()) == (True, "queued")
+    assert heavy.stats()["wait_seconds_max"] >= 0.05
+
+
+@pytest.fixture
+def routed_engines(monkeypatch, db_engine):
+    """Route sessions through per-bulkhead test engines, recording checkouts."""
+    default = create_engine(TEST_DATABASE_URL)
+    engines = {name: create_engine(TEST_DATABASE_URL) for name in bulkheads}
+    checkouts = []
+    for name, engine in {"default": default, **engines}.items():
+        event.listen(engine, "checkout", lambda *args, name=name: checkouts.append(name))
+        if name in bulkhead_engines:
+            monkeypatch.setitem(bulkhead_engines, name, engine)
+    monkeypatch.setattr("app.database.engine", default)
+    Session = sessionmaker(class_=RoutingSession, autoflush=False, bind=default)
+
+    def routed_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    monkeypatch.setitem(app.dependency_overrides, get_db, routed_get_db)
+    yield engines, checkouts
+    for engine in (default, *engines.values()):
+        engine.dispose()
+
+
+@pytest.mark.parametrize(
+    "method, path, pool",
+    [
+        ("get", "/api/v1/items/", "heavy"),
+        ("get", "/api/v1/items/999999", "reads"),
+        ("post", "/api/v1/items/", "writes"),
+    ],
+)
+def test_each_bulkhead_uses_its_own_engine(client: TestClient, routed_engines, method, path, pool):
+    """Test that a route's queries go through its bulkhead's connection pool."""
+    engines, checkouts = routed_engines
+    kwargs = {"json": {"title": "Bulkhead Item"}} if method == "post" else {}
+    client.request(method, path, **kwargs)
+    assert set(checkouts) == {pool}
+    # The session was closed in the bulkhead thread, before the response went out.
+    assert engines[pool].pool.checkedout() == 0
+
+
+def test_response_is_validated_in_the_bulkhead():
+    """Test that response_model validation runs in the bulkhead thread too."""
+    validated_in = []
+
+    class Answer(BaseModel):
+        value: int
+
+        @field_validator("value")
+        @classmethod
+        def record(cls, value):
+            validated_in.append(current_bulkhead.get())
+            return value
+
+    router = APIRouter(route_class=BulkheadRoute)
+
+    @router.get("/answer", response_model=Answer, status_code=201)
+    @bulkhead("reads")
+    def answer():
+        return {"value": 42}
+
+    test_app = FastAPI()
+    test_app.include_router(router)
+    response = TestClient(test_app).get("/answer")
+    assert response.status_code == 201
+    assert response.json() == {"value": 42}
+    assert validated_in == ["reads"]
+
+
+def test_bulkhead_connections_come_out_of_the_budget():
+    """Test that bulkhead pools share the overflow in proportion to their size."""
+    assert split_connections(10, {"reads": 20, "writes": 10, "heavy": 4}) == {
+        "reads": 5,
+        "writes": 3,
+        "heavy": 2,
+    }
+    assert split_connections(3, {"a": 100, "b": 1, "c": 1}) == {"a": 1, "b": 1, "c": 1}
+    with pytest.raises(ValueError):
+        split_connections(2, {"a": 1, "b": 1, "c": 1})
+
+
+def test_bulkheads_run_no_more_threads_than_connections():
+    """Test that each bulkhead's thread limit is capped at its connection share."""
+    for name, pool in bulkheads.items():
+        assert pool.size == min(settings.BULKHEADS[name], bulkhead_connections[name])
@@ -0,0 +1,128 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.coalescing import CoalescingMiddleware, generations
+
+
+def make_app(release: asyncio.Event, calls: list, fail: bool = False):
+    async def app(scope, receive, send):
+        calls.append(scope["path"])
+        number = len(calls)
+        await release.wait()
+        if fail and number == 1:
+            raise RuntimeError("boom")
+        body = f"response {number}".encode()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": body})
+
+    return CoalescingMiddleware(app, {r"/items/(\d+)?": ("coalescing-test",)})
+
+
+async def get(app, path: str = "/items/1", query: bytes = b"", headers=()):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": query, "headers": list(headers)}
+    try:
+        await app(scope, receive, send)
+    except RuntimeError:
+        return None
+    return messages[-1]["body"]
+
+
+def test_concurrent_identical_reads_share_one_response():
+    """Test that identical concurrent GETs run the endpoint once."""
+    calls = []
+
+    async def scenario():
+        release = asyncio.Event()
+        app = make_app(release, calls)
+        requests = [
+            asyncio.ensure_future(get(app, query=q))
+            for q in (b"a=1&b=2", b"b=2&a=1", b"a=1&b=2")
+        ]
+        other = asyncio.ensure_future(get(app, path="/items/2"))
+        await asyncio.sleep(0.01)
+        release.set()
+        return await asyncio.gather(*requests), await other
+
+    bodies, other = asyncio.run(scenario())
+    assert bodies == [b"response 1"] * 3
+    assert other == b"response 2"
+    assert calls == ["/items/1", "/items/2"]
+
+
+def test_write_starts_a_new_flight():
+    """Test that a read arriving after a committed write is not coalesced."""
+    calls = []
+
+    async def scenario():
+        release = asyncio.Event()
+        app = make_app(release, calls)
+        before = asyncio.ensure_future(get(app))
+        await asyncio.sleep(0.01)
+        generations.bump("coalescing-test")
+        after = asyncio.ensure_future(get(app))
+        await asyncio.sleep(0.01)
+        release.set()
+        return await before, await after
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+
+
+def test_followers_retry_when_leader_fails():
+    """Test that waiting requests run on their own if the leader errors."""
+    calls = []
+
+    async def scenario():
+        release = asyncio.Event()
+        app = make_app(release, calls, fail=True)
+        requests = [asyncio.ensure_future(get(app)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        release.set()
+        return await asyncio.gather(*requests)
+
+    leader, follower = asyncio.run(scenario())
+    assert leader is None
+    assert follower == b"response 2"
+
+
+def test_commit_bumps_generation(client: TestClient):
+    """Test that creating an item invalidates in-flight item reads."""
+    before = generations.get("items")
+    client.post("/api/v1/items/", json={"title": "Coalescing Item"})
+    assert generations.get("items") > before
+
+
+def test_metrics_reports_coalescing(client: TestClient):
+    """Test that per-channel coalescing counters are exported."""
+    client.get("/api/v1/items/")
+    stats = client.get("/metrics").json()["coalescing"]
+    assert stats["items"]["leaders"] >= 1
+    assert "coalesced" in stats["items"]
+
+
+def test_requests_from_other_origins_are_not_coalesced():
+    """Test that the CORS origin is part of the key, like the other vary headers."""
+    calls = []
+
+    async def scenario():
+        release = asyncio.Event()
+        app = make_app(release, calls)
+        requests = [
+            asyncio.ensure_future(get(app, headers=[(b"origin", origin)]))
+            for origin in (b"http://a.example", b"http://b.example")
+        ]
+        await asyncio.sleep(0.01)
+        release.set()
+        return await asyncio.gather(*requests)
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import zlib
+
+import zstandard
+from fastapi.testclient import TestClient
+
+from app import compression
+from app.compression import CompressionMiddleware, negotiate
+
+ENCODINGS = ["zstd", "br", "gzip"]
+
+
+def test_negotiate_prefers_highest_q_then_server_order():
+    """Test picking an encoding from Accept-Encoding."""
+    assert negotiate("gzip, deflate, br, zstd", ENCODINGS) == "zstd"
+    assert negotiate("gzip;q=1.0, br;q=0.8", ENCODINGS) == "gzip"
+    assert negotiate("*;q=0.5, zstd;q=0", ENCODINGS) == "br"
+    assert negotiate("identity", ENCODINGS) is None
+    assert negotiate("", ENCODINGS) is None
+
+
+def create_large_items(client: TestClient, count: int = 20):
+    for i in range(count):
+        client.post(
+            "/api/v1/items/",
+            json={"title": f"Compressed Item {i}", "description": "lorem ipsum " * 100},
+        )
+
+
+def test_large_list_is_compressed(client: TestClient):
+    """Test that a large page is gzipped and decodes to the same JSON."""
+    create_large_items(client)
+    response = client.get("/api/v1/items/", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert len(response.json()) >= 20
+
+
+def test_zstd_is_preferred(client: TestClient):
+    """Test that zstd wins when the client accepts it."""
+    create_large_items(client, 10)
+    with client.stream(
+        "GET", "/api/v1/items/", headers={"Accept-Encoding": "gzip, br, zstd"}
+    ) as response:
+        assert response.headers["content-encoding"] == "zstd"
+        body = zstandard.ZstdDecompressor().decompress(response.read())
+    assert body.startswith(b"[")
+
+
+def test_small_body_is_not_compressed(client: TestClient):
+    """Test that bodies under the threshold go out as they are."""
+    response = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"status": "healthy"}
+
+
+def test_metrics_reports_compression_per_route(client: TestClient):
+    """Test that ratio and CPU time are reported for each route."""
+    create_large_items(client, 5)
+    client.get("/api/v1/items/", headers={"Accept-Encoding": "gzip"})
+    stats = client.get("/metrics").json()["compression"]["/api/v1/items/"]
+    assert stats["responses"] >= 1
+    assert stats["ratio"] > 1
+    assert stats["cpu_seconds"] >= 0
+
+
+async def call(app, accept_encoding: bytes = b"gzip"):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/stream",
+        "headers": [(b"accept-encoding", accept_encoding)],
+    }
+    await app(scope, receive, send)
+    return messages
+
+
+def test_streaming_response_is_compressed_incrementally():
+    """Test that every streamed chunk can be decoded as soon as it arrives."""
+
+    async def app(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/event-stream")],
+            }
+        )
+        for event in (b"data: one\n\n", b"data: two\n\n"):
+            await send({"type": "http.response.body", "body": event, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    start, *bodies = asyncio.run(call(CompressionMiddleware(app)))
+    assert (b"content-encoding", b"gzip") in start["headers"]
+    decoder = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    assert decoder.decompress(bodies[0]["body"]) == b"data: one\n\n"
+    assert decoder.decompress(bodies[1]["body"]) == b"data: two\n\n"
+    assert decoder.decompress(bodies[2]["body"]) == b""
+    assert decoder.eof
+
+
+def test_large_payload_compresses_off_event_loop(monkeypatch):
+    """Test that payloads over the thread threshold are compressed in a worker thread."""
+    monkeypatch.setattr("app.compression.settings.COMPRESSION_THREAD_SIZE", 10)
+    threads = []
+    original = compression.compress
+
+    def record(encoding, data):
+        threads.append(threading.get_ident())
+        return original(encoding, data)
+
+    monkeypatch.setattr("app.compression.compress", record)
+
+    async def app(scope, receive, send):
+        await send(
+            {"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]}
+        )
+        await send({"type": "http.response.body", "body": b"x" * 4096})
+
+    asyncio.run(call(CompressionMiddleware(app)))
+    assert threads and threads[0] != threading.get_ident()
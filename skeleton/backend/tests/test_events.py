@@ -0,0 +1,165 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.events import (
+    ChangeBroker,
+    ChangeEvent,
+    PostgresChangeBroker,
+    event_stream,
+    get_broker,
+)
+from tests.conftest import TEST_DATABASE_URL
+
+
+class DisconnectedRequest:
+    async def is_disconnected(self):
+        return True
+
+
+def test_create_item_publishes_change(client: TestClient, sample_item_data):
+    """Test that repository writes land on the change feed after commit."""
+    response = client.post("/api/v1/items/", json=sample_item_data)
+    item_id = response.json()["id"]
+
+    change = get_broker().history("items")[-1]
+    assert change.op == "create"
+    assert change.pk == item_id
+    assert change.data["title"] == sample_item_data["title"]
+
+
+def test_rollback_discards_staged_changes(db_session):
+    """Test that changes staged in a rolled back transaction are never sent."""
+    broker = get_broker()
+    before = len(broker.history("items"))
+    broker.stage(db_session, ChangeEvent(broker.next_id(db_session), "items", "create", 1))
+    db_session.rollback()
+    assert len(broker.history("items")) == before
+
+
+def test_event_stream_resumes_after_last_event_id(monkeypatch):
+    """Test that a reconnecting client only replays events it has not seen."""
+    broker = ChangeBroker()
+    for pk in (1, 2, 3):
+        broker.dispatch(ChangeEvent(pk, "items", "create", pk))
+    monkeypatch.setattr("app.events.broker", broker)
+    monkeypatch.setattr("app.events.settings.CHANGE_FEED_HEARTBEAT_SECONDS", 0.01)
+
+    async def collect():
+        return [
+            chunk
+            async for chunk in event_stream(DisconnectedRequest(), "items", 1)
+        ]
+
+    chunks = asyncio.run(collect())
+    assert chunks[0].startswith("retry:")
+    assert [chunk.split("\n")[0] for chunk in chunks[1:]] == ["id: 2", "id: 3"]
+    assert "event: create" in chunks[1]
+
+
+def replayed(broker: ChangeBroker, last_event_id: int):
+    async def subscribe():
+        subscription = broker.subscribe("items", last_event_id)
+        changes = []
+        while not subscription.queue.empty():
+            changes.append(subscription.queue.get_nowait())
+        return changes
+
+    return asyncio.run(subscribe())
+
+
+def test_resume_replays_by_commit_order():
+    """Test that an event committed after a higher id is still replayed."""
+    broker = ChangeBroker()
+    # Transaction B got id 6 but committed before A, which got id 5.
+    for event_id in (4, 6, 5):
+        broker.dispatch(ChangeEvent(event_id, "items", "create", event_id))
+    assert [change.id for change in replayed(broker, 6)] == [5]
+
+
+def test_resume_from_unknown_id_sends_reset():
+    """Test that a client resuming past the history is told to refetch."""
+    broker = ChangeBroker(history_size=2)
+    for event_id in (1, 2, 3):
+        broker.dispatch(ChangeEvent(event_id, "items", "create", event_id))
+    (reset,) = replayed(broker, 1)
+    assert reset.op == "reset"
+    assert reset.to_sse().startswith("id: 3\nevent: reset\n")
+
+
+def test_postgres_broker_delivers_in_commit_order(db_engine):
+    """Test NOTIFY fan-out, including events committed out of id order."""
+    broker = PostgresChangeBroker(TEST_DATABASE_URL, channels=["items"])
+    engine = create_engine(TEST_DATABASE_URL)
+    Session = sessionmaker(bind=engine)
+    broker.start()
+    try:
+        # Give the listener a moment to LISTEN before anything is sent.
+        time.sleep(0.5)
+        with Session() as first, Session() as second:
+            first_id = broker.next_id(first)
+            second_id = broker.next_id(second)
+            broker.stage(first, ChangeEvent(first_id, "items", "create", 1, {"id": 1}))
+            broker.stage(second, ChangeEvent(second_id, "items", "create", 2, {"id": 2}))
+            second.commit()
+            first.commit()
+
+        deadline = time.monotonic() + 5
+        while len(broker.history("items")) < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert [change.id for change in broker.history("items")] == [second_id, first_id]
+        assert [change.id for change in replayed(broker, second_id)] == [first_id]
+    finally:
+        broker.stop()
+        engine.dispose()
+
+
+def wait_for(condition, timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+def test_discontinuity_resets_resuming_clients():
+    """Test that a client resuming from before lost events is told to refetch."""
+    broker = ChangeBroker()
+    for event_id in (1, 2):
+        broker.dispatch(ChangeEvent(event_id, "items", "create", event_id))
+    broker.discontinuity(["items"])
+    broker.dispatch(ChangeEvent(3, "items", "create", 3))
+    (reset,) = replayed(broker, 1)
+    assert reset.op == "reset"
+
+
+def test_postgres_broker_survives_bad_payloads_and_reconnects(db_engine):
+    """Test that the listener outlives a malformed NOTIFY and a dropped connection."""
+    broker = PostgresChangeBroker(TEST_DATABASE_URL, channels=["items"])
+    engine = create_engine(TEST_DATABASE_URL, isolation_level="AUTOCOMMIT")
+    notify = text("SELECT pg_notify('changes_items', :payload)")
+    broker.start()
+    try:
+        time.sleep(0.5)
+        with engine.connect() as connection:
+            connection.execute(notify, {"payload": "not json"})
+            connection.execute(
+                notify, {"payload": ChangeEvent(1, "items", "create", 1).to_json()}
+            )
+            wait_for(lambda: len(broker.history("items")) == 1)
+            assert broker._thread is not None and broker._thread.is_alive()
+            assert [change.id for change in broker.history("items")] == [1]
+
+            connection.execute(
+                text(
+                    "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                    "WHERE query LIKE 'LISTEN %' AND pid <> pg_backend_pid()"
+                )
+            )
+            wait_for(lambda: not broker.history("items"))
+            # Whatever was sent while it was down is gone, so resuming resets.
+            assert replayed(broker, 1)[0].op == "reset"
+    finally:
+        broker.stop()
+        engine.dispose()
@@ -0,0 +1,152 @@
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+from alembic.operations import Operations
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine, text
+
+from app.partitions import (
+    add_months,
+    archive_partitions,
+    convert_items_to_partitioned,
+    ensure_partitions,
+    is_partition,
+    is_partitioned,
+    list_partitions,
+    month_start,
+    partition_name,
+    revert_items_to_plain,
+)
+from tests.conftest import TEST_DATABASE_URL
+
+SCRATCH = "partition_test"
+
+
+def test_month_arithmetic():
+    """Test the month boundaries used for partition ranges."""
+    assert month_start(date(2026, 10, 19)) == date(2026, 10, 1)
+    assert add_months(date(2026, 11, 1), 1) == date(2026, 12, 1)
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), 24) == date(2028, 1, 1)
+
+
+def test_partition_names():
+    """Test that partition tables are recognised by name."""
+    assert partition_name(date(2026, 3, 1)) == "items_p202603"
+    assert is_partition("items_p202603")
+    assert is_partition("items_legacy")
+    assert not is_partition("items")
+    assert not is_partition("import_jobs")
+
+
+@pytest.fixture
+def scratch(monkeypatch, db_engine):
+    """Point app.partitions at a scratch table so items is left alone."""
+    engine = create_engine(TEST_DATABASE_URL)
+    monkeypatch.setattr("app.partitions.TABLE", SCRATCH)
+    monkeypatch.setattr("app.partitions.LEGACY_PARTITION", f"{SCRATCH}_legacy")
+    monkeypatch.setattr("app.partitions.engine", engine)
+    yield engine
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP TABLE IF EXISTS {SCRATCH}, {SCRATCH}_legacy CASCADE"))
+        connection.execute(text("DROP SCHEMA IF EXISTS archive CASCADE"))
+    engine.dispose()
+
+
+@contextmanager
+def migration(engine):
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection)
+        with Operations.context(context), context.begin_transaction():
+            yield connection
+
+
+def partitioned_scratch(engine) -> None:
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                f"CREATE TABLE {SCRATCH} (id integer, created_at timestamptz NOT NULL) "
+                f"PARTITION BY RANGE (created_at)"
+            )
+        )
+        ensure_partitions(connection, months_ahead=2, start=date(2026, 1, 1))
+
+
+def test_ensure_partitions(scratch):
+    """Test that monthly partitions are created up to the horizon, once."""
+    partitioned_scratch(scratch)
+    with scratch.begin() as connection:
+        assert list_partitions(connection) == [
+            (f"{SCRATCH}_p202601", date(2026, 2, 1)),
+            (f"{SCRATCH}_p202602", date(2026, 3, 1)),
+            (f"{SCRATCH}_p202603", date(2026, 4, 1)),
+        ]
+        assert ensure_partitions(connection, months_ahead=2, start=date(2026, 1, 1)) == []
+        assert ensure_partitions(connection, months_ahead=3, start=date(2026, 1, 1)) == [
+            f"{SCRATCH}_p202604"
+        ]
+
+
+def test_archive_partitions(scratch):
+    """Test that old partitions are detached and archived or dropped."""
+    partitioned_scratch(scratch)
+    assert archive_partitions(date(2026, 3, 1)) == [
+        f"{SCRATCH}_p202601",
+        f"{SCRATCH}_p202602",
+    ]
+    assert archive_partitions(date(2026, 4, 1), drop=True) == [f"{SCRATCH}_p202603"]
+    with scratch.connect() as connection:
+        assert list_partitions(connection) == []
+        regclass = "SELECT to_regclass(:name) IS NOT NULL"
+        assert connection.execute(text(regclass), {"name": f"archive.{SCRATCH}_p202601"}).scalar()
+        assert not connection.execute(text(regclass), {"name": f"{SCRATCH}_p202603"}).scalar()
+
+
+def test_convert_and_revert(scratch):
+    """Test partitioning a populated table in place and undoing it."""
+    with scratch.begin() as connection:
+        connection.execute(
+            text(
+                f"CREATE TABLE {SCRATCH} (id serial PRIMARY KEY, title varchar NOT NULL, "
+                f"created_at timestamptz DEFAULT now())"
+            )
+        )
+        connection.execute(text(f"CREATE INDEX ix_{SCRATCH}_id ON {SCRATCH} (id)"))
+        connection.execute(text(f"CREATE INDEX ix_{SCRATCH}_title ON {SCRATCH} (title)"))
+        connection.execute(
+            text(
+                f"INSERT INTO {SCRATCH} (title, created_at) VALUES "
+                f"('old', now() - interval '40 days'), ('undated', NULL), ('current', now())"
+            )
+        )
+
+    with migration(scratch):
+        convert_items_to_partitioned()
+    with scratch.begin() as connection:
+        assert is_partitioned(connection)
+        names = [name for name, _ in list_partitions(connection)]
+        assert names[0] == f"{SCRATCH}_legacy"
+        assert len(names) == 5
+        # New rows land in the monthly partitions.
+        connection.execute(
+            text(f"INSERT INTO {SCRATCH} (title, created_at) VALUES ('next', :at)"),
+            {"at": add_months(month_start(date.today()), 1)},
+        )
+        assert connection.execute(text(f"SELECT count(*) FROM {SCRATCH}_legacy")).scalar() == 3
+
+    with migration(scratch):
+        revert_items_to_plain()
+    with scratch.connect() as connection:
+        assert not is_partitioned(connection)
+        assert connection.execute(text(f"SELECT count(*) FROM {SCRATCH}")).scalar() == 4
+        key = connection.execute(
+            text(
+                "SELECT pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conname = :name AND contype = 'p'"
+            ),
+            {"name": f"{SCRATCH}_pkey"},
+        ).scalar()
+        assert key == "PRIMARY KEY (id)"
+        next_id = connection.execute(text(f"SELECT pg_get_serial_sequence('{SCRATCH}', 'id')"))
+        assert next_id.scalar() == f"public.{SCRATCH}_id_seq"